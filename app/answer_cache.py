@@ -0,0 +1,184 @@
+import re
+import threading
+import time
+import logging
+from collections import OrderedDict
+import numpy as np
+
+import config
+
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_query(text: str) -> str:
+    """
+    Normalizes a question so trivially different phrasings share a cache key.
+
+    Lower-cases, collapses whitespace and strips surrounding quotes and
+    punctuation, e.g. ' What department spent the MOST? ' and
+    '"what department spent the most"' both become
+    'what department spent the most'.
+    """
+    text = re.sub(r"\s+", " ", text.strip().lower())
+    return text.strip(" \"'.,?!")
+
+
+# Words that pin a question to specific periods, ranks or amounts: numbers
+# (years, top-N, FY2014 -> 2014), quarters, months and ordinals
+SPECIFIC_TERMS = re.compile(
+    r"\d+|\bq[1-4]\b|\b(?:jan(?:uary)?|feb(?:ruary)?|mar(?:ch)?|apr(?:il)?|may|june?|july?|aug(?:ust)?"
+    r"|sep(?:t(?:ember)?)?|oct(?:ober)?|nov(?:ember)?|dec(?:ember)?|first|second|third|fourth|last|"
+    r"one|two|three|four|five|six|seven|eight|nine|ten)\b"
+)
+
+# Spelled-out forms of specific terms, so "q1" and "first quarter" match
+_SPECIFIC_ALIASES = {
+    "january": "jan", "february": "feb", "march": "mar", "april": "apr", "june": "jun",
+    "july": "jul", "august": "aug", "september": "sep", "sept": "sep", "october": "oct",
+    "november": "nov", "december": "dec", "first": "1", "second": "2", "third": "3", "fourth": "4",
+    "one": "1", "two": "2", "three": "3", "four": "4", "five": "5", "six": "6", "seven": "7",
+    "eight": "8", "nine": "9", "ten": "10",
+}
+
+
+def specific_terms(normalized):
+    """
+    The numbers, years, quarters and months of a normalized question, e.g.
+    "total spend in q1 2013" -> ("1", "2013"). Two questions can only share
+    an answer when these are identical.
+    """
+    terms = []
+    for term in SPECIFIC_TERMS.findall(normalized):
+        term = term[1:] if term.startswith("q") else term
+        terms.append(_SPECIFIC_ALIASES.get(term, term))
+    return tuple(sorted(terms))
+
+
+def load_embedder(model_name):
+    """
+    Loads a local sentence-transformers model for near-duplicate matching.
+
+    Args:
+        model_name (str): Model name or path; empty to disable the tier.
+
+    Returns:
+        callable | None: Function mapping a string to a unit-length vector,
+        or None if no model is configured or the package isn't installed.
+    """
+    if not model_name:
+        return None
+    try:
+        from sentence_transformers import SentenceTransformer
+    except ImportError:
+        logger.warning("sentence-transformers is not installed; semantic answer cache disabled")
+        return None
+
+    model = SentenceTransformer(model_name)
+
+    def embed(text):
+        return model.encode(text, normalize_embeddings=True)
+
+    return embed
+
+
+class AnswerCache:
+    """
+    LRU + TTL cache of chat answers keyed by normalized question text and
+    dataset version.
+
+    Exact (normalized) matches are looked up directly. When an embedder is
+    configured, a miss falls back to the most similar cached question for
+    the same dataset version, provided its cosine similarity reaches
+    ``similarity_threshold`` and it names exactly the same numbers, years,
+    quarters and months (see specific_terms): "total spend in 2013" and
+    "total spend in 2014" embed almost identically but must not share an
+    answer.
+    """
+
+    def __init__(self, max_entries=1024, ttl_seconds=3600.0, embedder=None, similarity_threshold=0.92):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.embedder = embedder
+        self.similarity_threshold = similarity_threshold
+        # (normalized question, dataset version) -> (stored at, embedding, answer, specific terms)
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "semantic_hits": 0, "misses": 0, "evictions": 0, "expirations": 0}
+
+    def _expired(self, stored_at):
+        return self.ttl_seconds > 0 and time.monotonic() - stored_at > self.ttl_seconds
+
+    def get(self, question, version):
+        """
+        Looks up a cached answer.
+
+        Args:
+            question (str): The user's question.
+            version (int): Current dataset version.
+
+        Returns:
+            The cached answer, or None on a miss.
+        """
+        key = (normalize_query(question), version)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if not self._expired(entry[0]):
+                    self._entries.move_to_end(key)
+                    self.stats["hits"] += 1
+                    return entry[2]
+                del self._entries[key]
+                self.stats["expirations"] += 1
+
+        if self.embedder is not None:
+            answer = self._get_similar(key[0], version)
+            if answer is not None:
+                return answer
+
+        with self._lock:
+            self.stats["misses"] += 1
+        return None
+
+    def _get_similar(self, normalized, version):
+        vector = self.embedder(normalized)
+        terms = specific_terms(normalized)
+        with self._lock:
+            candidates = [
+                (key, entry) for key, entry in self._entries.items()
+                if key[1] == version and entry[1] is not None and entry[3] == terms
+                and not self._expired(entry[0])
+            ]
+            if not candidates:
+                return None
+            similarities = np.stack([entry[1] for _, entry in candidates]) @ vector
+            best = int(np.argmax(similarities))
+            if similarities[best] < self.similarity_threshold:
+                return None
+            key, entry = candidates[best]
+            self._entries.move_to_end(key)
+            self.stats["semantic_hits"] += 1
+            return entry[2]
+
+    def put(self, question, version, answer):
+        """Stores an answer, evicting the least recently used entries if full."""
+        normalized = normalize_query(question)
+        vector = self.embedder(normalized) if self.embedder is not None else None
+        with self._lock:
+            self._entries[(normalized, version)] = (time.monotonic(), vector, answer, specific_terms(normalized))
+            self._entries.move_to_end((normalized, version))
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.stats["evictions"] += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+answer_cache = AnswerCache(
+    max_entries=config.ANSWER_CACHE_SIZE,
+    ttl_seconds=config.ANSWER_CACHE_TTL,
+    embedder=load_embedder(config.ANSWER_CACHE_EMBED_MODEL),
+    similarity_threshold=config.ANSWER_CACHE_SIMILARITY,
+)
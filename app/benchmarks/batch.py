@@ -0,0 +1,60 @@
+"""
+Compares answering every question of Tries/*/User_Queries_Test.txt (repeats
+included) one POST /api/v1/chat/submit/{chat_id} at a time, as reporting
+jobs used to, with a single POST /api/v1/chat/batch.
+
+Start the server with the stub LLM, e.g.
+
+    LLM_PROVIDER=stub STUB_LLM_LATENCY=0.8 uvicorn main:app
+
+then, from the ``app`` directory:
+
+    python -m benchmarks.batch --cold
+
+With ``--cold`` every run gets a unique suffix on its questions (repeats
+within a run stay identical), so the answer cache and fast path miss.
+"""
+import argparse
+import time
+
+import httpx
+
+from benchmarks.loadtest import CORPUS_GLOB, load_corpus
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--corpus", default=CORPUS_GLOB, help="Glob of question files")
+    parser.add_argument("--cold", action="store_true", help="Make the questions unique to bypass caches")
+    args = parser.parse_args()
+
+    questions = load_corpus(args.corpus, distinct=False)
+    if not questions:
+        parser.error(f"No questions found in {args.corpus}")
+    print(f"{len(questions)} questions, {len(set(questions))} distinct, from {args.corpus}")
+
+    def variant(label):
+        if not args.cold:
+            return questions
+        run = time.time_ns()
+        return [f"{question} ({label} {run})" for question in questions]
+
+    with httpx.Client(base_url=args.base_url, timeout=None) as client:
+        started = time.perf_counter()
+        for i, question in enumerate(variant("sequential")):
+            client.post(f"/api/v1/chat/submit/batch-benchmark-{i}", json={"request": question}).raise_for_status()
+        sequential = time.perf_counter() - started
+
+        started = time.perf_counter()
+        response = client.post("/api/v1/chat/batch", json={"questions": variant("batch")})
+        response.raise_for_status()
+        batch = time.perf_counter() - started
+
+    body = response.json()
+    print(f"sequential  {sequential:8.2f}s")
+    print(f"batch       {batch:8.2f}s  ({body['distinct']} distinct questions answered)")
+
+
+if __name__ == "__main__":
+    main()
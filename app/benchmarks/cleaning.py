@@ -0,0 +1,133 @@
+"""
+Times each step of clean_and_process_data against the previous row-wise
+implementation, on the real dataset and on a synthetic one.
+
+Run from the ``app`` directory:
+
+    python -m benchmarks.cleaning --rows 5000000
+"""
+import argparse
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+import config
+import dataset
+
+
+def legacy_parse_dates(df):
+    if "Purchase Date" in df.columns:
+        df['Purchase Date'] = pd.to_datetime(
+            [date[:-4] + '20' + date[-2:] if isinstance(date, str) else date for date in df['Purchase Date']],
+            errors='coerce'
+        )
+    if "Creation Date" in df.columns:
+        df['Creation Date'] = pd.to_datetime(df['Creation Date'], format='%m/%d/%Y', errors='coerce')
+    return df
+
+
+def legacy_standardize_fiscal_year(df):
+    if "Fiscal Year" in df.columns:
+        df["Fiscal Year"] = df["Fiscal Year"].apply(lambda x: f"FY{x}" if "FY" not in str(x) else x).astype("category")
+    return df
+
+
+def legacy_clean_prices(df):
+    for col in ["Unit Price", "Total Price"]:
+        if col in df.columns:
+            df[col] = df[col].replace('[\\$,]', '', regex=True).astype(float).fillna(0)
+    return df
+
+
+# The pre-vectorization pipeline: identical except for the rewritten steps
+LEGACY_STEPS = {
+    "parse_dates": legacy_parse_dates,
+    "standardize_fiscal_year": legacy_standardize_fiscal_year,
+    "clean_prices": legacy_clean_prices,
+}
+
+
+def synthetic_frame(rows, seed=0):
+    """
+    Builds a raw frame shaped like the procurement extract.
+
+    Args:
+        rows (int): Number of rows to generate.
+        seed (int): Random seed.
+
+    Returns:
+        pd.DataFrame: Raw (uncleaned) synthetic data.
+    """
+    rng = np.random.default_rng(seed)
+    created = pd.Timestamp("2012-07-01") + pd.to_timedelta(rng.integers(0, 1460, rows), unit="D")
+    purchased = created - pd.to_timedelta(rng.integers(0, 30, rows), unit="D")
+    unit_price = rng.gamma(2.0, 500.0, rows).round(2)
+    quantity = rng.integers(1, 50, rows).astype(float)
+
+    def money(values):
+        return pd.Series(values).map("${:,.2f}".format)
+
+    return pd.DataFrame({
+        "Creation Date": pd.Series(created).dt.strftime("%m/%d/%Y"),
+        "Purchase Date": pd.Series(purchased).dt.strftime("%m/%d/%Y"),
+        "Fiscal Year": rng.choice(["2012-2013", "2013-2014", "2014-2015", "2015-2016"], rows),
+        "Purchase Order Number": pd.Series(np.arange(rows)).map("PO{:08d}".format),
+        "Acquisition Type": rng.choice(["IT Goods", "IT Services", "NON-IT Goods", "NON-IT Services"], rows),
+        "Acquisition Method": rng.choice(["Informal Competitive", "Formal Competitive", "Fair and Reasonable"], rows),
+        "Department Name": pd.Series(rng.integers(0, 150, rows)).map("Department {}".format),
+        "Supplier Code": rng.integers(1000, 60000, rows).astype(float),
+        "Supplier Name": pd.Series(rng.integers(0, 20000, rows)).map("Supplier {}".format),
+        "CalCard": rng.choice(["YES", "NO"], rows),
+        "Item Name": pd.Series(rng.integers(0, 50000, rows)).map("Item {}".format),
+        "Item Description": pd.Series(rng.integers(0, 80000, rows)).map("Description of item {}".format),
+        "Quantity": quantity,
+        "Unit Price": money(unit_price),
+        "Total Price": money(unit_price * quantity),
+    })
+
+
+def time_pipeline(raw, steps):
+    """Runs the given cleaning steps on a copy of ``raw`` and times each one."""
+    df = raw.copy()
+    timings = {}
+    for name, step in steps:
+        started = time.perf_counter()
+        df = step(df)
+        timings[name] = time.perf_counter() - started
+    return df, timings
+
+
+def compare(label, raw):
+    legacy_steps = [(name, LEGACY_STEPS.get(name, step)) for name, step in dataset.CLEANING_STEPS]
+    legacy_df, legacy_times = time_pipeline(raw, legacy_steps)
+    new_df, new_times = time_pipeline(raw, dataset.CLEANING_STEPS)
+
+    pd.testing.assert_frame_equal(legacy_df, new_df)
+
+    print(f"\n{label}: {len(raw):,} rows (outputs identical)")
+    print(f"{'step':<26}{'legacy (s)':>12}{'vectorized (s)':>16}{'speedup':>10}")
+    for name, _ in dataset.CLEANING_STEPS:
+        before, after = legacy_times[name], new_times[name]
+        print(f"{name:<26}{before:>12.3f}{after:>16.3f}{before / max(after, 1e-9):>9.1f}x")
+    before, after = sum(legacy_times.values()), sum(new_times.values())
+    print(f"{'total':<26}{before:>12.3f}{after:>16.3f}{before / max(after, 1e-9):>9.1f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--csv", default=config.DATA_PATH, help="Raw procurement CSV to benchmark")
+    parser.add_argument("--rows", type=int, default=5_000_000, help="Rows in the synthetic dataset")
+    args = parser.parse_args()
+
+    if os.path.exists(args.csv):
+        compare("Real dataset", pd.read_csv(args.csv))
+    else:
+        print(f"Skipping real dataset: {args.csv} not found")
+
+    compare("Synthetic dataset", synthetic_frame(args.rows))
+
+
+if __name__ == "__main__":
+    main()
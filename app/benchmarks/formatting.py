@@ -0,0 +1,72 @@
+"""
+Compares ways of turning a query result into table data for the frontend:
+serializing the result object directly (what the chat endpoints do),
+re-parsing its text rendering in-process, and the former loopback POST to
+/api/v1/process-data.
+
+Run from the ``app`` directory with the API server running:
+
+    python -m benchmarks.formatting --iterations 200 --rows 20 1000
+"""
+import argparse
+import statistics
+import time
+
+import httpx
+import pandas as pd
+
+from main import format_response
+from pandas_exec import render_result, serialize_result
+
+
+def sample_result(rows):
+    """A typical query result: spend per department, as a pandas Series."""
+    index = pd.Index([f"Department {i}" for i in range(rows)], name="Department Name")
+    return pd.Series([1_000_000 / (i + 1) for i in range(rows)], index=index, name="Total Price")
+
+
+def report(label, latencies):
+    latencies = sorted(latencies)
+    p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+    print(f"{label:<12} p50={statistics.median(latencies) * 1000:.3f}ms p95={p95 * 1000:.3f}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--rows", type=int, nargs="+", default=[20, 1000])
+    args = parser.parse_args()
+
+    for rows in args.rows:
+        result = sample_result(rows)
+        message = render_result(result)
+
+        structured = []
+        for _ in range(args.iterations):
+            started = time.perf_counter()
+            serialize_result(result)
+            structured.append(time.perf_counter() - started)
+
+        in_process = []
+        for _ in range(args.iterations):
+            started = time.perf_counter()
+            format_response(message)
+            in_process.append(time.perf_counter() - started)
+
+        # The old path opened a fresh client (and TCP connection) per chat
+        loopback = []
+        for _ in range(args.iterations):
+            started = time.perf_counter()
+            with httpx.Client(base_url=args.base_url) as client:
+                client.post("/api/v1/process-data", json={"message": message}).raise_for_status()
+            loopback.append(time.perf_counter() - started)
+
+        print(f"{rows} rows:")
+        report("structured", structured)
+        report("in-process", in_process)
+        report("loopback", loopback)
+
+
+if __name__ == "__main__":
+    main()
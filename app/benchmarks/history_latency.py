@@ -0,0 +1,86 @@
+"""
+Load test showing that chat history reads stay fast while chat queries are
+in flight. Starts N concurrent chat submissions against a running server and
+polls the history endpoint until they have all finished. Every submission
+gets a unique suffix, so the fast path and the answer cache miss and each
+query goes through the LLM.
+
+Run from the ``app`` directory with the API server running:
+
+    python -m benchmarks.history_latency --concurrency 8
+"""
+import argparse
+import asyncio
+import statistics
+import time
+import uuid
+
+import httpx
+
+
+QUESTION = "Which items were bought most often?"
+
+
+def summarize(label, latencies):
+    latencies = sorted(latencies)
+    if not latencies:
+        print(f"{label}: no samples")
+        return
+    p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+    print(
+        f"{label}: n={len(latencies)} p50={statistics.median(latencies) * 1000:.1f}ms "
+        f"p95={p95 * 1000:.1f}ms max={latencies[-1] * 1000:.1f}ms"
+    )
+
+
+async def poll_history(client, chat_id, stop, interval):
+    latencies = []
+    while not stop.is_set():
+        started = time.perf_counter()
+        response = await client.get(f"/api/v1/chat/history/{chat_id}")
+        response.raise_for_status()
+        latencies.append(time.perf_counter() - started)
+        await asyncio.sleep(interval)
+    return latencies
+
+
+async def submit(client, chat_id, run_id):
+    question = f"{QUESTION} (history latency {run_id}-{chat_id})"
+    started = time.perf_counter()
+    response = await client.post(f"/api/v1/chat/submit/{chat_id}", json={"request": question})
+    response.raise_for_status()
+    return time.perf_counter() - started
+
+
+async def run(base_url, concurrency, interval):
+    async with httpx.AsyncClient(base_url=base_url, timeout=None) as client:
+        # Baseline: history reads on an idle server
+        stop = asyncio.Event()
+        baseline_task = asyncio.create_task(poll_history(client, "load-test-history", stop, interval))
+        await asyncio.sleep(2)
+        stop.set()
+        summarize("history (idle)", await baseline_task)
+
+        # History reads while `concurrency` chat queries are in flight
+        run_id = uuid.uuid4().hex[:8]
+        stop = asyncio.Event()
+        history_task = asyncio.create_task(poll_history(client, "load-test-history", stop, interval))
+        chat_latencies = await asyncio.gather(
+            *(submit(client, f"load-test-{i}", run_id) for i in range(concurrency))
+        )
+        stop.set()
+        summarize(f"history ({concurrency} chats in flight)", await history_task)
+        summarize("chat submit", chat_latencies)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--concurrency", type=int, default=8, help="Chat queries in flight")
+    parser.add_argument("--interval", type=float, default=0.05, help="Seconds between history reads")
+    args = parser.parse_args()
+    asyncio.run(run(args.base_url, args.concurrency, args.interval))
+
+
+if __name__ == "__main__":
+    main()
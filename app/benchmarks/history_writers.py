@@ -0,0 +1,93 @@
+"""
+Stress test for the SQLite chat history under concurrent writers: several
+processes, each with several threads, append to overlapping chats at once
+(like gunicorn workers sharing one database). Checks that no append is lost
+or fails, that per-chat caps hold, and reports append/read throughput.
+
+Run from the ``app`` directory:
+
+    python -m benchmarks.history_writers --processes 4 --threads 8
+"""
+import argparse
+import os
+import tempfile
+import threading
+import time
+from multiprocessing import Process
+
+from history import SQLiteHistory
+
+
+def write(path, process, threads, appends, chats, max_messages):
+    history = SQLiteHistory(path, max_messages=max_messages, max_chats=chats)
+
+    def run(thread):
+        for i in range(appends):
+            chat_id = f"chat-{(process * threads + thread + i) % chats}"
+            history.append(chat_id, [
+                {"role": "user", "message": f"p{process} t{thread} #{i}"},
+                {"role": "assistant", "message": "answer"},
+            ])
+
+    workers = [threading.Thread(target=run, args=(t,)) for t in range(threads)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    history.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--processes", type=int, default=4)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--appends", type=int, default=200, help="Appends per thread")
+    parser.add_argument("--chats", type=int, default=16)
+    args = parser.parse_args()
+
+    total = args.processes * args.threads * args.appends
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "history.db")
+        # Cap large enough to keep everything, so lost writes would show
+        SQLiteHistory(path).close()
+        started = time.perf_counter()
+        processes = [
+            Process(target=write, args=(path, p, args.threads, args.appends, args.chats, total * 2))
+            for p in range(args.processes)
+        ]
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join()
+        elapsed = time.perf_counter() - started
+        failed = [p.exitcode for p in processes if p.exitcode != 0]
+        assert not failed, f"{len(failed)} writer processes failed"
+
+        history = SQLiteHistory(path)
+        started = time.perf_counter()
+        stored = sum(len(history.get(f"chat-{c}")) for c in range(args.chats))
+        read_elapsed = time.perf_counter() - started
+        assert stored == total * 2, f"expected {total * 2} messages, found {stored}"
+        print(f"{total} appends from {args.processes}x{args.threads} writers in {elapsed:.2f}s "
+              f"({total / elapsed:,.0f}/s), none lost")
+        print(f"read {stored} messages across {args.chats} chats in {read_elapsed * 1000:.1f}ms")
+
+        # Per-chat cap: a small cap must hold under the same concurrency
+        capped = os.path.join(tmp, "capped.db")
+        SQLiteHistory(capped).close()
+        processes = [
+            Process(target=write, args=(capped, p, args.threads, args.appends, args.chats, 10))
+            for p in range(args.processes)
+        ]
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join()
+        history = SQLiteHistory(capped)
+        sizes = [len(history.get(f"chat-{c}")) for c in range(args.chats)]
+        assert max(sizes) <= 10, f"per-chat cap exceeded: {max(sizes)}"
+        print(f"cap of 10 messages per chat held (largest chat: {max(sizes)})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,201 @@
+"""
+Load test for POST /api/v1/chat/submit/{chat_id}: replays the question corpus
+from Tries/*/User_Queries_Test.txt at several concurrency levels and reports
+p50/p95/p99 latency, throughput, answer sources and the per-stage breakdown
+from the Server-Timing header. Results are written as JSON, and can be
+compared with an earlier run to spot regressions.
+
+No Groq key is needed: start the server with the stub LLM, e.g.
+
+    LLM_PROVIDER=stub STUB_LLM_LATENCY=0.8 uvicorn main:app
+
+then, from the ``app`` directory:
+
+    python -m benchmarks.loadtest --concurrency 1 4 16 --cold
+    python -m benchmarks.loadtest --compare benchmarks/results/<earlier run>.json
+
+With ``--cold`` every request gets a unique suffix, so the answer cache and
+the fast path miss and each question goes through the (stub) LLM.
+"""
+import argparse
+import asyncio
+import glob
+import json
+import os
+import re
+import statistics
+import subprocess
+import time
+from collections import Counter, defaultdict
+from datetime import datetime, timezone
+
+import httpx
+
+
+CORPUS_GLOB = os.path.join("..", "Tries", "*", "User_Queries_Test.txt")
+RESULTS_DIR = os.path.join("benchmarks", "results")
+
+
+def load_corpus(pattern, distinct=True):
+    """Returns the (distinct) quoted questions of every file matching ``pattern``."""
+    questions = []
+    for path in sorted(glob.glob(pattern)):
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                match = re.match(r'\s*"(.+?)"', line)
+                if match and not (distinct and match[1] in questions):
+                    questions.append(match[1])
+    return questions
+
+
+def percentile(values, q):
+    values = sorted(values)
+    if not values:
+        return None
+    return values[min(len(values) - 1, int(round(q / 100 * (len(values) - 1))))]
+
+
+def parse_server_timing(header):
+    """Parses 'stage;dur=12.3, other;dur=4' into {stage: milliseconds}."""
+    timings = {}
+    for part in filter(None, (p.strip() for p in header.split(","))):
+        name, _, params = part.partition(";")
+        match = re.search(r"dur=([\d.]+)", params)
+        if match:
+            timings[name.strip()] = float(match[1])
+    return timings
+
+
+async def run_level(client, questions, concurrency, requests, cold, run_id):
+    """Sends ``requests`` questions with at most ``concurrency`` in flight."""
+    semaphore = asyncio.Semaphore(concurrency)
+    samples = []
+
+    async def one(i):
+        question = questions[i % len(questions)]
+        if cold:
+            question = f"{question} (load test {run_id}-{concurrency}-{i})"
+        async with semaphore:
+            started = time.perf_counter()
+            try:
+                response = await client.post(f"/api/v1/chat/submit/load-test-{i}", json={"request": question})
+                latency = time.perf_counter() - started
+                ok = response.status_code == 200
+                source = response.json().get("source") if ok else None
+                stages = parse_server_timing(response.headers.get("server-timing", ""))
+            except httpx.HTTPError:
+                latency, ok, source, stages = time.perf_counter() - started, False, None, {}
+        samples.append({"latency": latency, "ok": ok, "source": source, "stages": stages})
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(requests)))
+    elapsed = time.perf_counter() - started
+    return summarize(concurrency, samples, elapsed)
+
+
+def summarize(concurrency, samples, elapsed):
+    latencies = [s["latency"] * 1000 for s in samples if s["ok"]]
+    stages = defaultdict(list)
+    for sample in samples:
+        for stage, ms in sample["stages"].items():
+            stages[stage].append(ms)
+    return {
+        "concurrency": concurrency,
+        "requests": len(samples),
+        "errors": sum(not s["ok"] for s in samples),
+        "seconds": round(elapsed, 3),
+        "throughput_rps": round(len(latencies) / elapsed, 2) if elapsed else None,
+        "latency_ms": {
+            "p50": percentile(latencies, 50),
+            "p95": percentile(latencies, 95),
+            "p99": percentile(latencies, 99),
+            "mean": statistics.fmean(latencies) if latencies else None,
+            "max": max(latencies, default=None),
+        },
+        "sources": dict(Counter(s["source"] for s in samples if s["ok"])),
+        "stages_ms": {
+            stage: {"mean": statistics.fmean(values), "p95": percentile(values, 95), "count": len(values)}
+            for stage, values in sorted(stages.items())
+        },
+    }
+
+
+def print_level(level, baseline=None):
+    lat = level["latency_ms"]
+    line = (
+        f"c={level['concurrency']:>3}  n={level['requests']:>4}  err={level['errors']:>3}  "
+        f"{level['throughput_rps']:>7.2f} req/s  p50={lat['p50']:.0f}ms  p95={lat['p95']:.0f}ms  "
+        f"p99={lat['p99']:.0f}ms"
+    ) if lat["p50"] is not None else f"c={level['concurrency']:>3}  all {level['requests']} requests failed"
+    print(line)
+    if baseline and lat["p50"] is not None and baseline["latency_ms"]["p50"] is not None:
+        deltas = [
+            f"{key} {(lat[key] / baseline['latency_ms'][key] - 1):+.0%}" for key in ("p50", "p95", "p99")
+        ]
+        deltas.append(f"throughput {(level['throughput_rps'] / baseline['throughput_rps'] - 1):+.0%}")
+        print("        vs baseline: " + "  ".join(deltas))
+    print("        sources: " + ", ".join(f"{k}={v}" for k, v in level["sources"].items()))
+    for stage, stats in level["stages_ms"].items():
+        print(f"        {stage:<10} mean={stats['mean']:8.1f}ms  p95={stats['p95']:8.1f}ms  (n={stats['count']})")
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+async def run(args, questions):
+    run_id = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S")
+    baseline = {}
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = {level["concurrency"]: level for level in json.load(f)["levels"]}
+
+    levels = []
+    limits = httpx.Limits(max_connections=max(args.concurrency))
+    async with httpx.AsyncClient(base_url=args.base_url, timeout=None, limits=limits) as client:
+        for concurrency in args.concurrency:
+            requests = args.requests or len(questions)
+            level = await run_level(client, questions, concurrency, requests, args.cold, run_id)
+            print_level(level, baseline.get(concurrency))
+            levels.append(level)
+
+    results = {
+        "run": run_id,
+        "commit": git_commit(),
+        "base_url": args.base_url,
+        "cold": args.cold,
+        "questions": len(questions),
+        "levels": levels,
+    }
+    output = args.output or os.path.join(RESULTS_DIR, f"load-{run_id}.json")
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+    print(f"\nResults written to {output}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16])
+    parser.add_argument("--requests", type=int, help="Requests per level (default: one per question)")
+    parser.add_argument("--corpus", default=CORPUS_GLOB, help="Glob of question files")
+    parser.add_argument("--cold", action="store_true", help="Make every question unique to bypass caches")
+    parser.add_argument("--output", help="JSON results file (default: benchmarks/results/load-<time>.json)")
+    parser.add_argument("--compare", help="Earlier results file to compare against")
+    args = parser.parse_args()
+
+    questions = load_corpus(args.corpus)
+    if not questions:
+        parser.error(f"No questions found in {args.corpus}")
+    print(f"{len(questions)} distinct questions from {args.corpus}")
+    asyncio.run(run(args, questions))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,31 @@
+"""
+Prints the dtype and memory footprint of every column of the cleaned frame,
+before and after dtype optimization.
+
+Run from the ``app`` directory:
+
+    python -m benchmarks.memory
+"""
+import argparse
+
+import pandas as pd
+
+import config
+from dataset import clean_and_process_data, sort_by_creation_date
+from dtypes import format_report, optimize_dtypes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--path", default=config.DATA_PATH)
+    args = parser.parse_args()
+
+    df = sort_by_creation_date(clean_and_process_data(pd.read_csv(args.path)))
+    _, report = optimize_dtypes(df)
+    print(format_report(report))
+    before, after = report["bytes_before"].sum(), report["bytes_after"].sum()
+    print(f"\nSaved {(before - after) / 2**20:,.1f} MiB ({1 - after / before:.0%})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+"""
+Measures time to first byte of the streaming chat endpoint and when each
+event arrives. The blocking /chat/submit endpoint does the same work up to
+the ``rows`` event before it sends anything, so the gap between ``code``
+(or the first byte) and ``rows`` is how much sooner users see progress.
+
+Run from the ``app`` directory with the API server running. Use questions
+that are not cached yet, so the LLM path is measured:
+
+    python -m benchmarks.stream_ttfb --question "Which items did the Department of Corrections buy most often?"
+"""
+import argparse
+import json
+import time
+
+import httpx
+
+
+def stream_once(client, chat_id, question):
+    """Returns seconds to first byte, to the first of each event, and in total."""
+    started = time.perf_counter()
+    timings = {}
+    event = None
+    with client.stream("POST", f"/api/v1/chat/submit/{chat_id}/stream", json={"request": question}) as response:
+        response.raise_for_status()
+        for line in response.iter_lines():
+            timings.setdefault("first byte", time.perf_counter() - started)
+            if line.startswith("event:"):
+                event = line[len("event:"):].strip()
+            elif line.startswith("data:") and event not in timings:
+                timings[event] = time.perf_counter() - started
+                if event == "done":
+                    timings["source"] = json.loads(line[len("data:"):])["source"]
+    timings["total"] = time.perf_counter() - started
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--question", action="append", required=True,
+                        help="Uncached question; repeat for several")
+    args = parser.parse_args()
+
+    with httpx.Client(base_url=args.base_url, timeout=None) as client:
+        for question in args.question:
+            print(question)
+            timings = stream_once(client, "ttfb-stream", question)
+            print(f"  stream ({timings.pop('source', '?')}): " + "  ".join(
+                f"{name}={seconds * 1000:.0f}ms" for name, seconds in timings.items()
+            ))
+
+
+if __name__ == "__main__":
+    main()
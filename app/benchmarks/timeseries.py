@@ -0,0 +1,82 @@
+"""
+Compares full-frame boolean filtering on "Creation Date" with the sorted
+time index and rollups, for the time-based questions in
+User_Queries_Test.txt.
+
+Run from the ``app`` directory:
+
+    python -m benchmarks.timeseries --repeat 20
+"""
+import argparse
+import time
+
+import pandas as pd
+
+import config
+from dataset import load_dataset
+from timeseries import TimeIndex
+
+
+# (question, first month, last month, breakdown rollup or None for a single total)
+TIME_QUERIES = [
+    ("How many purchase orders were created in each month of 2014?", "2014-01", "2014-12", "monthly"),
+    ("Which quarter had the highest total spending in 2013?", "2013-01", "2013-12", "quarterly"),
+    ("What is the trend of monthly spending from January 2012 to December 2015?", "2012-01", "2015-12", "monthly"),
+    ("How many orders were created in Q1 2015?", "2015-01", "2015-03", None),
+    ("What is the total number of orders placed in January 2013?", "2013-01", "2013-01", None),
+    ("What was the total expenditure in Q4 2014?", "2014-10", "2014-12", None),
+    ("Show the monthly breakdown of the total number of orders for 2015.", "2015-01", "2015-12", "monthly"),
+    ("What was the total spending in the second half of 2013?", "2013-07", "2013-12", None),
+    ("What is the average monthly expenditure in 2012?", "2012-01", "2012-12", "monthly"),
+    ("How has the total spending changed over the quarters in 2013?", "2013-01", "2013-12", "quarterly"),
+]
+
+FREQUENCIES = {"monthly": "M", "quarterly": "Q"}
+
+
+def full_scan(df, start, end, rollup):
+    created = df["Creation Date"]
+    rows = df[(created >= start) & (created < end)]
+    if rollup is None:
+        return len(rows), rows["Total Price"].sum()
+    return rows["Total Price"].groupby(rows["Creation Date"].dt.to_period(FREQUENCIES[rollup])).agg(["size", "sum"])
+
+
+def indexed(index, start, end, rollup):
+    if rollup is None:
+        summary = index.summary(start, end)
+        return summary["orders"], summary["total"]
+    return index.rollup(rollup, start, end)
+
+
+def best_of(repeat, fn, *args):
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn(*args)
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--csv", default=config.DATA_PATH, help="Raw procurement CSV")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    df = load_dataset(args.csv, use_cache=config.DATA_CACHE_ENABLED)
+    started = time.perf_counter()
+    index = TimeIndex(df)
+    print(f"{len(df):,} rows, time index built in {time.perf_counter() - started:.3f}s\n")
+
+    print(f"{'full scan (ms)':>15}{'indexed (ms)':>14}{'speedup':>10}  question")
+    for question, first, last, rollup in TIME_QUERIES:
+        start = pd.Period(first, freq="M").start_time
+        end = (pd.Period(last, freq="M") + 1).start_time
+        scan = best_of(args.repeat, full_scan, df, start, end, rollup)
+        fast = best_of(args.repeat, indexed, index, start, end, rollup)
+        print(f"{scan * 1000:>15.3f}{fast * 1000:>14.3f}{scan / max(fast, 1e-9):>9.1f}x  {question}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+Measures the memory of each API worker for 1, 4 and 8 gunicorn workers, with
+the dataset shared through the memory-mapped snapshot and with a private
+copy per worker (DATA_SHARED=false).
+
+RSS counts shared pages in every process that maps them; PSS divides them
+between those processes, so the PSS total is the memory the workers really
+use. Linux only (reads /proc/<pid>/smaps_rollup).
+
+Run from the ``app`` directory (no server running on the port):
+
+    python -m benchmarks.worker_rss --workers 1 4 8
+"""
+import argparse
+import os
+import signal
+import subprocess
+import sys
+import time
+
+import httpx
+
+
+def memory_kb(pid):
+    """Rss, Pss and private bytes (in kB) of a process."""
+    fields = {}
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) == 3 and parts[2] == "kB":
+                fields[parts[0].rstrip(":")] = int(parts[1])
+    private = fields.get("Private_Clean", 0) + fields.get("Private_Dirty", 0)
+    return fields.get("Rss", 0), fields.get("Pss", 0), private
+
+
+def worker_pids(master_pid):
+    with open(f"/proc/{master_pid}/task/{master_pid}/children") as f:
+        return [int(pid) for pid in f.read().split()]
+
+
+def wait_until_ready(base_url, workers, master_pid, timeout):
+    """Waits until all workers have started and the API answers."""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if len(worker_pids(master_pid)) == workers:
+                httpx.get(f"{base_url}/api/v1/stats", timeout=5).raise_for_status()
+                return
+        except (httpx.HTTPError, OSError):
+            pass
+        time.sleep(1)
+    raise TimeoutError(f"{workers} workers did not start within {timeout}s")
+
+
+def measure(workers, shared, port, settle, timeout):
+    env = dict(os.environ, WEB_CONCURRENCY=str(workers), BIND=f"127.0.0.1:{port}",
+               DATA_SHARED="true" if shared else "false")
+    server = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "main:app"],
+        env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        wait_until_ready(f"http://127.0.0.1:{port}", workers, server.pid, timeout)
+        # Every worker loads the dataset in its own lifespan; let them finish
+        time.sleep(settle)
+        samples = [memory_kb(pid) for pid in worker_pids(server.pid)]
+    finally:
+        server.send_signal(signal.SIGTERM)
+        server.wait()
+
+    rss = sum(s[0] for s in samples) / len(samples) / 1024
+    pss = sum(s[1] for s in samples) / 1024
+    private = sum(s[2] for s in samples) / len(samples) / 1024
+    label = "shared" if shared else "private"
+    print(
+        f"{workers:>2} workers, {label:<7}: RSS/worker {rss:8,.1f} MiB  "
+        f"private/worker {private:8,.1f} MiB  PSS total {pss:9,.1f} MiB"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 4, 8])
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--settle", type=float, default=15, help="Seconds to wait after startup")
+    parser.add_argument("--timeout", type=float, default=600, help="Seconds allowed for startup")
+    args = parser.parse_args()
+    for shared in (True, False):
+        for workers in args.workers:
+            measure(workers, shared, args.port, args.settle, args.timeout)
+
+
+if __name__ == "__main__":
+    main()
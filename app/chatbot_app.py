@@ -10,21 +10,78 @@ USER_AVATAR = "👤"
 BOT_AVATAR = "🤖"
 BACKEND_URL = "http://localhost:8000"
 
+# Messages fetched per history request
+HISTORY_PAGE_SIZE = 100
+
 # Initialize or load chat history
 session_name = "default"
 if "messages" not in st.session_state:
-    try:
-        response = requests.get(f"{BACKEND_URL}/api/v1/chat/history/{session_name}")
+    st.session_state.messages = []
+    # Sequence number of the newest message we have, and the ETag of the
+    # last history request made with that cursor
+    st.session_state.history_since = 0
+    st.session_state.history_etag = None
+
+
+def sync_history():
+    """Fetches only the messages added since the last sync."""
+    url = f"{BACKEND_URL}/api/v1/chat/history/{session_name}"
+    while True:
+        since = st.session_state.history_since
+        headers = {}
+        if st.session_state.history_etag:
+            headers["If-None-Match"] = st.session_state.history_etag
+        response = requests.get(url, params={"since": since, "limit": HISTORY_PAGE_SIZE}, headers=headers)
+        if response.status_code == 304:
+            return
         response.raise_for_status()
-        st.session_state.messages = response.json()
-    except requests.exceptions.RequestException as e:
-        st.session_state.messages = []
-        # st.error(f"Error loading chat history: {e}")
+        page = response.json()
+        st.session_state.messages.extend(page)
+        st.session_state.history_since = int(response.headers.get("X-Next-Since", since))
+        # The ETag is only valid for the cursor it was returned for
+        unchanged = st.session_state.history_since == since
+        st.session_state.history_etag = response.headers.get("ETag") if unchanged else None
+        if len(page) < HISTORY_PAGE_SIZE:
+            return
+
+
+def result_frame(result):
+    """Builds a DataFrame from a typed columnar result sent by the server."""
+    columns = result["columns"]
+    frame = pd.DataFrame({i: column["values"] for i, column in enumerate(columns)})
+    for i, column in enumerate(columns):
+        if column["type"] == "datetime":
+            frame[i] = pd.to_datetime(frame[i])
+    frame.columns = [column["name"] for column in columns]
+    return frame
+
+
+def iter_sse(response):
+    """Parses a Server-Sent Events response into (event, data) pairs."""
+    event, data = "message", []
+    for line in response.iter_lines(decode_unicode=True):
+        if not line:
+            if data:
+                yield event, json.loads("\n".join(data))
+            event, data = "message", []
+        elif line.startswith("event:"):
+            event = line[len("event:"):].strip()
+        elif line.startswith("data:"):
+            data.append(line[len("data:"):].strip())
+
+
+try:
+    sync_history()
+except requests.exceptions.RequestException as e:
+    # st.error(f"Error loading chat history: {e}")
+    pass
 
 # Sidebar with a button to delete chat history
 with st.sidebar:
     if st.button("Delete Chat History"):
         st.session_state.messages = []
+        st.session_state.history_since = 0
+        st.session_state.history_etag = None
         try:
             requests.delete(f"{BACKEND_URL}/api/v1/chat/history/{session_name}")
         except requests.exceptions.RequestException as e:
@@ -39,44 +96,61 @@ for message in st.session_state.messages:
 # Main chat interface
 prompt = st.chat_input("How can I help?")
 if prompt:
-    st.session_state.messages.append({"role": "user", "message": prompt})
     with st.chat_message("user", avatar=USER_AVATAR):
         st.markdown(prompt)
 
     headers = {'Content-Type': 'application/json'}
     payload = json.dumps({"request": prompt})
 
-    with st.spinner("Generating response..."):
+    # Stream the answer: the generated code, then the result table, then
+    # the written answer, each shown as soon as the server sends it
+    with st.chat_message("assistant", avatar=BOT_AVATAR):
+        status = st.empty()
+        code_area = st.empty()
+        table_area = st.empty()
+        text_area = st.empty()
+        status.caption("Generating response...")
+        text = ""
+        has_table = False
         try:
-            res = requests.post(f"{BACKEND_URL}/api/v1/chat/submit/{session_name}",
-                                data=payload,
-                                headers=headers)
-            res.raise_for_status()
-            response_json = res.json()
-
-            # Display processed data from /process-data endpoint as a table
-            data = response_json.get("data", [])
-            if data:
-                #st.subheader("Processed Data:")
-                # Convert data to DataFrame
-                df = pd.DataFrame(data)
-                # Display the table
-                st.table(df)
-            else:
-                st.write("No data available to display.")
-
-            # Get the assistant's response message
-            response_message = response_json.get("message", None)
-            if response_message:  # Only display the message and avatar if there's a valid response
-                st.session_state.messages.append({"role": "assistant", "message": response_message})
-                with st.chat_message("assistant", avatar=BOT_AVATAR):
-                    st.markdown(response_message)
+            with requests.post(f"{BACKEND_URL}/api/v1/chat/submit/{session_name}/stream",
+                               data=payload,
+                               headers=headers,
+                               stream=True) as res:
+                res.raise_for_status()
+                for event, data in iter_sse(res):
+                    if event == "code":
+                        with code_area.expander("Generated code"):
+                            st.code(data["code"], language="python")
+                        status.caption("Running the code...")
+                    elif event == "rows":
+                        # Display the result as a table, or a single value
+                        result = data.get("result")
+                        if result and result["kind"] == "table":
+                            frame = result_frame(result)
+                            with table_area.container():
+                                st.dataframe(frame, hide_index=True)
+                                if result["truncated"]:
+                                    st.caption(f"First {len(frame):,} of {result['row_count']:,} rows")
+                            has_table = True
+                        elif result:
+                            table_area.markdown(f"**{result['value']}**")
+                            has_table = True
+                        status.caption("Writing the answer...")
+                    elif event == "text":
+                        text += data["delta"]
+                        text_area.markdown(text)
+                    elif event == "done":
+                        status.empty()
+                        if not text and not has_table:
+                            text_area.markdown(data["response"])
 
         except requests.exceptions.RequestException as e:
+            status.empty()
             st.error(f"Error sending message: {e}")
 
-    # Save chat history after each interaction
+    # The server stored both messages; pick them up with their sequence numbers
     try:
-        requests.post(f"{BACKEND_URL}/api/v1/chat/history/{session_name}", json=st.session_state.messages)
+        sync_history()
     except requests.exceptions.RequestException as e:
-        st.error(f"Error saving chat history: {e}")
+        st.error(f"Error loading chat history: {e}")
@@ -0,0 +1,108 @@
+import os
+from dotenv import load_dotenv
+
+
+# Load environment variables
+load_dotenv()
+
+api_key = os.getenv("GROQ_API_KEY")
+model = os.getenv("LLM_MODEL")
+
+# Location of the raw procurement CSV extract
+DATA_PATH = os.getenv("PROCUREMENT_DATA_PATH", "PURCHASE ORDER DATA EXTRACT 2012-2015_0.csv")
+
+# Directory holding the cleaned, columnar snapshot of the dataset
+DATA_CACHE_DIR = os.getenv("DATA_CACHE_DIR", ".cache")
+DATA_CACHE_ENABLED = os.getenv("DATA_CACHE_ENABLED", "true").lower() == "true"
+
+# Serve the dataset straight from the memory-mapped snapshot, so that all
+# worker processes on a host share one copy of it (requires DATA_CACHE_ENABLED)
+DATA_SHARED = os.getenv("DATA_SHARED", "true").lower() == "true"
+
+# "full" reads the whole CSV at once; "streaming" reads and cleans it in chunks
+INGEST_MODE = os.getenv("INGEST_MODE", "full")
+INGEST_CHUNKSIZE = int(os.getenv("INGEST_CHUNKSIZE", "100000"))
+
+# Add precomputed statistics (date ranges, top categories, price quantiles)
+# to the dataset context sent to the LLM
+RICH_CONTEXT = os.getenv("RICH_CONTEXT", "false").lower() == "true"
+
+# "groq", or "stub" for an offline stand-in that returns canned pandas code
+# (see stub_llm.py); used by the load-test benchmarks
+LLM_PROVIDER = os.getenv("LLM_PROVIDER", "groq").lower()
+
+# Seconds the stub LLM waits per call, plus a random extra of up to the jitter
+STUB_LLM_LATENCY = float(os.getenv("STUB_LLM_LATENCY", "0.5"))
+STUB_LLM_JITTER = float(os.getenv("STUB_LLM_JITTER", "0"))
+
+# Optional JSON file mapping exact questions to the stub's pandas code
+STUB_LLM_RESPONSES = os.getenv("STUB_LLM_RESPONSES", "")
+
+# Groq client settings; one pooled client is shared by every request
+LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", "60"))
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "3"))
+LLM_MAX_CONNECTIONS = int(os.getenv("LLM_MAX_CONNECTIONS", "20"))
+LLM_KEEPALIVE_EXPIRY = float(os.getenv("LLM_KEEPALIVE_EXPIRY", "60"))
+
+# Maximum number of chat queries (LLM call + pandas evaluation) run at once
+CHAT_CONCURRENCY = int(os.getenv("CHAT_CONCURRENCY", "4"))
+
+# Maximum number of distinct questions of one /chat/batch request answered at
+# once; they share the chat slots above with interactive queries
+BATCH_CONCURRENCY = int(os.getenv("BATCH_CONCURRENCY", str(CHAT_CONCURRENCY)))
+
+# Maximum number of questions accepted in one /chat/batch request
+BATCH_MAX_QUESTIONS = int(os.getenv("BATCH_MAX_QUESTIONS", "200"))
+
+# Answer cache in front of the query engine
+ANSWER_CACHE_SIZE = int(os.getenv("ANSWER_CACHE_SIZE", "1024"))
+ANSWER_CACHE_TTL = float(os.getenv("ANSWER_CACHE_TTL", "3600"))
+# Local sentence-transformers model for matching paraphrased questions;
+# leave empty to only match identical (normalized) questions
+ANSWER_CACHE_EMBED_MODEL = os.getenv("ANSWER_CACHE_EMBED_MODEL", "")
+ANSWER_CACHE_SIMILARITY = float(os.getenv("ANSWER_CACHE_SIMILARITY", "0.92"))
+
+# Persistent cache of question -> generated pandas code
+EXPRESSION_CACHE_PATH = os.getenv("EXPRESSION_CACHE_PATH", os.path.join(DATA_CACHE_DIR, "expressions.json"))
+EXPRESSION_CACHE_SIZE = int(os.getenv("EXPRESSION_CACHE_SIZE", "5000"))
+
+# Let the LLM answer aggregate questions from the department x supplier x
+# acquisition x CalCard x month cube instead of the row-level dataset
+CUBE_ENABLED = os.getenv("CUBE_ENABLED", "true").lower() == "true"
+
+# Hard limit for the cleaned dataset's in-memory size; 0 disables the check
+MEMORY_BUDGET_MB = int(os.getenv("MEMORY_BUDGET_MB", "0"))
+
+# Chat history backend: "sqlite" (shared by workers, kept across restarts) or "memory"
+HISTORY_BACKEND = os.getenv("HISTORY_BACKEND", "sqlite").lower()
+HISTORY_DB_PATH = os.getenv("HISTORY_DB_PATH", os.path.join(DATA_CACHE_DIR, "chat_history.db"))
+
+# Messages kept per chat; older ones are dropped
+HISTORY_MAX_MESSAGES = int(os.getenv("HISTORY_MAX_MESSAGES", "200"))
+
+# Chats idle for longer than this many seconds are deleted; 0 keeps them forever
+HISTORY_TTL_SECONDS = int(os.getenv("HISTORY_TTL_SECONDS", str(7 * 24 * 3600)))
+
+# Maximum number of chats kept; the least recently active are deleted first
+HISTORY_MAX_CHATS = int(os.getenv("HISTORY_MAX_CHATS", "10000"))
+
+# Stream a natural-language answer after the table on /chat/submit/{chat_id}/stream
+# (one extra LLM call per question answered by the LLM)
+STREAM_SYNTHESIS = os.getenv("STREAM_SYNTHESIS", "true").lower() == "true"
+
+# Run LLM-generated pandas code in pre-forked, resource-limited worker processes
+SANDBOX_ENABLED = os.getenv("SANDBOX_ENABLED", "true").lower() == "true"
+SANDBOX_WORKERS = int(os.getenv("SANDBOX_WORKERS", str(CHAT_CONCURRENCY)))
+
+# Seconds generated code may run before its worker is killed
+SANDBOX_TIMEOUT = float(os.getenv("SANDBOX_TIMEOUT", "30"))
+
+# Memory generated code may allocate, in MB; 0 disables the cap
+SANDBOX_MEMORY_MB = int(os.getenv("SANDBOX_MEMORY_MB", "2048"))
+
+# Results are cut to this many rows and characters
+SANDBOX_MAX_ROWS = int(os.getenv("SANDBOX_MAX_ROWS", "1000"))
+SANDBOX_MAX_CHARS = int(os.getenv("SANDBOX_MAX_CHARS", "100000"))
+
+# Level of the application's own log messages
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
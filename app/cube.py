@@ -0,0 +1,160 @@
+import re
+from collections import defaultdict
+import pandas as pd
+
+from dataset import store
+from suppliers import LEGAL_SUFFIXES, normalize_supplier_name
+
+
+# Dimensions of the aggregate cube, in group-by order
+DIMENSIONS = [
+    "Department Name", "Supplier Name", "Acquisition Type",
+    "Acquisition Method", "CalCard", "Fiscal Year", "Month",
+]
+
+# Words a question may use when it only refers to cube dimensions and
+# measures: question and filler words, the measures (spend and order
+# counts), the dimensions and the time periods the Month dimension covers.
+# Values of the dimensions (department names, ...) are added per dataset
+# version by build_vocabulary.
+CUBE_VOCABULARY = set("""
+    a about across all also among amount an and any are as at be been between by can compare
+    compared comparison did do does during each every for from give got had has have how i in
+    is it its list many me most much my of on or over per please show than that the their there
+    these this those through to tell versus vs was we were what when where which who with within
+    highest lowest largest smallest biggest top bottom least more less fewest rank ranked ranking
+    total totals sum overall average mean share percentage percent proportion number count
+    trend change growth increase decrease breakdown distribution
+    spend spent spending spends expenditure expenditures expense expenses cost costs paid pay
+    payment payments money dollars revenue received receive get made make value
+    order orders purchase purchases procurement procurements po pos
+    department departments dept agency agencies supplier suppliers vendor vendors name names
+    acquisition type types method methods calcard cal card cards use used using yes no
+    fiscal year years yearly annual annually fy month months monthly quarter quarters quarterly
+    q1 q2 q3 q4 january february march april may june july august september october november
+    december jan feb mar apr jun jul aug sep sept oct nov dec time period
+""".split())
+
+# Questions mentioning any of these need row-level data the cube doesn't
+# keep, even though each word may be in the vocabulary
+ROW_LEVEL_TERMS = [
+    "item", "unit price", "quantity", "description", "purchase date",
+    "purchase order number", "supplier code", "median", "daily", "per day",
+    "week", "single order", "largest order", "biggest order",
+]
+
+CUBE_NOTE = (
+    "\nThis table is a pre-aggregated cube: each row sums all purchase orders "
+    "sharing the same dimension values. 'Month' is the first day of the "
+    "Creation Date month. Use df['Total Price'].sum() for spending and "
+    "df['Order Count'].sum() (never len(df) or count()) for numbers of orders.\n"
+)
+
+
+def build_cube(df):
+    """
+    Materializes sums and counts of Total Price over DIMENSIONS.
+
+    Args:
+        df (pd.DataFrame): Cleaned procurement data.
+
+    Returns:
+        pd.DataFrame: One row per observed dimension combination, with
+        "Total Price" (sum) and "Order Count" columns.
+    """
+    month = df["Creation Date"].dt.to_period("M").dt.to_timestamp().rename("Month")
+    keys = [df[dim] for dim in DIMENSIONS[:-1]] + [month]
+    cube = df["Total Price"].groupby(keys, observed=True, dropna=False).agg(["sum", "size"])
+    cube = cube.rename(columns={"sum": "Total Price", "size": "Order Count"}).reset_index()
+    return restore_categories(cube, df)
+
+
+def update_cube(cube, new_rows):
+    """
+    Folds newly appended rows into an existing cube without rescanning the
+    rows it was built from.
+
+    Args:
+        cube (pd.DataFrame): Cube built by build_cube.
+        new_rows (pd.DataFrame): Cleaned rows appended to the dataset.
+
+    Returns:
+        pd.DataFrame: The updated cube.
+    """
+    combined = pd.concat([cube, build_cube(new_rows)], ignore_index=True)
+    cube = (
+        combined.groupby(DIMENSIONS, observed=True, dropna=False)[["Total Price", "Order Count"]]
+        .sum()
+        .reset_index()
+    )
+    return restore_categories(cube, combined)
+
+
+def restore_categories(cube, source):
+    """Keeps dimension columns categorical when they are in ``source``."""
+    for dim in DIMENSIONS[:-1]:
+        if isinstance(source[dim].dtype, pd.CategoricalDtype) or source[dim].dtype == object:
+            cube[dim] = cube[dim].astype("category")
+    return cube
+
+
+def build_vocabulary(df):
+    """
+    Words of the dimension values, and the normalized supplier names indexed
+    by their first word, used by can_answer.
+    """
+    words = set()
+    for dim in ["Department Name", "Acquisition Type", "Acquisition Method", "CalCard", "Fiscal Year"]:
+        if dim in df.columns:
+            for value in pd.unique(df[dim].dropna().astype(str)):
+                words.update(re.findall(r"[a-z0-9]+", value.lower()))
+    suppliers = defaultdict(list)
+    if "Supplier Name" in df.columns:
+        for name in pd.unique(df["Supplier Name"].dropna().astype(str)):
+            key = normalize_supplier_name(name)
+            if key:
+                suppliers[key.split(" ", 1)[0]].append(key.split(" "))
+    return {"words": words, "suppliers": suppliers}
+
+
+def _known(word, words):
+    if word.isdigit() or word in CUBE_VOCABULARY or word in LEGAL_SUFFIXES or word in words:
+        return True
+    # Plurals and possessives ("departments", "department's" -> "s")
+    return word == "s" or (word.endswith("s") and _known(word[:-1], words))
+
+
+def can_answer(question):
+    """
+    Whether ``question`` can be answered from the cube alone: every word it
+    uses must refer to a cube dimension or measure (see CUBE_VOCABULARY),
+    a dimension value, or be part of a supplier's name. A question with any
+    other word ("How many laptops were bought?") goes to the full dataset.
+    """
+    question = question.lower()
+    if any(term in question for term in ROW_LEVEL_TERMS):
+        return False
+    vocabulary = get_vocabulary()
+    tokens = re.findall(r"[a-z0-9]+", question.replace("&", " and "))
+    i = 0
+    while i < len(tokens):
+        # Skip over the longest supplier name starting here
+        names = vocabulary["suppliers"].get(tokens[i], [])
+        length = max((len(name) for name in names if tokens[i:i + len(name)] == name), default=0)
+        if length:
+            i += length
+        elif _known(tokens[i], vocabulary["words"]):
+            i += 1
+        else:
+            return False
+    return True
+
+
+def get_vocabulary():
+    """Returns the can_answer vocabulary for the current dataset version."""
+    return store.derived("cube_vocabulary", build_vocabulary)
+
+
+def get_cube():
+    """Returns the cube for the current dataset version, built or updated once."""
+    return store.derived("cube", build_cube, updater=update_cube)
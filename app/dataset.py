@@ -0,0 +1,759 @@
+import hashlib
+import os
+import contextlib
+import threading
+import time
+import logging
+import sys
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.feather as feather
+
+try:
+    import fcntl
+except ImportError:  # Windows: no cross-process lock, each worker may build the snapshot
+    fcntl = None
+
+import config
+from dtypes import format_report, optimize_dtypes
+from metrics import span
+from suppliers import canonicalize_suppliers, extend_suppliers
+
+
+logger = logging.getLogger(__name__)
+
+# Copy-on-write makes shallow copies handed out by DatasetStore behave as
+# independent frames, so query code can never mutate the shared dataset.
+pd.set_option("mode.copy_on_write", True)
+
+# Bump whenever clean_and_process_data changes its output so that cached
+# snapshots produced by older cleaning code are rebuilt.
+CLEANING_VERSION = "7"
+
+# Bump when the on-disk snapshot layout changes (v2: uncompressed, so that it
+# can be memory-mapped and shared zero-copy between worker processes; v3: one
+# record batch, since columns split over several are copied on read)
+SNAPSHOT_FORMAT = "3"
+
+# Columns that are never used by the chatbot and are dropped on load
+COLUMNS_TO_DROP = [
+    'LPA Number', 'Requisition Number', 'Sub-Acquisition Type',
+    'Sub-Acquisition Method', 'Supplier Qualifications',
+    'Supplier Zip Code', 'Classification Codes', 'Commodity Title',
+    'Location', 'Normalized UNSPSC', 'Class', 'Class Title',
+    'Family', 'Family Title', 'Segment', 'Segment Title'
+]
+
+CATEGORICAL_COLUMNS = [
+    "Acquisition Type", "Acquisition Method", "Department Name", "CalCard"
+]
+
+# Explicit dtypes for the raw columns kept by the cleaning pipeline, used by
+# the streaming reader so chunks don't depend on per-chunk type inference
+RAW_DTYPES = {
+    "Creation Date": str, "Purchase Date": str, "Fiscal Year": str,
+    "Purchase Order Number": str, "Acquisition Type": "category",
+    "Acquisition Method": "category", "Department Name": "category",
+    "Supplier Code": float, "Supplier Name": str, "CalCard": "category",
+    "Item Name": str, "Item Description": str, "Quantity": float,
+    "Unit Price": str, "Total Price": str,
+}
+
+# Format of "Purchase Date" once the year has been expanded to four digits
+PURCHASE_DATE_FORMAT = "%m/%d/%Y"
+
+# Format of "Creation Date", month first like "Purchase Date" (e.g. 08/27/2013)
+CREATION_DATE_FORMAT = "%m/%d/%Y"
+
+
+def drop_unused_columns(df):
+    """Drops the columns listed in COLUMNS_TO_DROP."""
+    return df.drop(columns=[col for col in COLUMNS_TO_DROP if col in df.columns])
+
+
+def drop_duplicate_rows(df):
+    """Removes fully duplicated rows."""
+    return df.drop_duplicates()
+
+
+def fill_missing_values(df):
+    """Fills missing supplier and item fields and fixes their dtypes."""
+    df['Supplier Code'] = df['Supplier Code'].fillna(0).astype(float)
+    df['Supplier Name'] = df['Supplier Name'].fillna("N/A").astype("string")
+    df['Item Name'] = df['Item Name'].fillna("N/A").astype("string")
+    df['Item Description'] = df['Item Description'].fillna("N/A").astype("string")
+    return df
+
+
+def dedupe_purchase_orders(df):
+    """Keeps the first row of each Purchase Order Number."""
+    # Optimize Purchase Order Number by converting to category
+    df['Purchase Order Number'] = df['Purchase Order Number'].astype('category')
+    return df.drop_duplicates(subset=['Purchase Order Number'])
+
+
+def validate_raw_rows(df):
+    """
+    Checks that raw rows can go through the cleaning pipeline: every column
+    of RAW_DTYPES is present, numeric columns hold numbers, prices hold
+    numbers or "$1,234.56" text and Creation Date is a CREATION_DATE_FORMAT
+    date.
+
+    Args:
+        df (pd.DataFrame): Rows in the raw CSV layout.
+
+    Returns:
+        dict: Problems found, e.g. ``{"missing_columns": [...],
+        "invalid_values": {column: [row positions]}}``; empty if none.
+    """
+    problems = {}
+    missing = [col for col in RAW_DTYPES if col not in df.columns]
+    if missing:
+        problems["missing_columns"] = missing
+
+    def prices(values):
+        text = values.astype(str).str.replace("$", "", regex=False).str.replace(",", "", regex=False)
+        return pd.to_numeric(text, errors="coerce")
+
+    checks = {col: lambda values: pd.to_numeric(values, errors="coerce")
+              for col, dtype in RAW_DTYPES.items() if dtype is float}
+    checks["Unit Price"] = checks["Total Price"] = prices
+    checks["Creation Date"] = lambda values: pd.to_datetime(
+        values, format=CREATION_DATE_FORMAT, errors="coerce"
+    )
+
+    invalid = {}
+    for col, convert in checks.items():
+        if col in df.columns:
+            # Values that are present but don't convert
+            bad = df[col].notna().to_numpy() & convert(df[col]).isna().to_numpy()
+            if bad.any():
+                invalid[col] = np.flatnonzero(bad).tolist()
+    if invalid:
+        problems["invalid_values"] = invalid
+    return problems
+
+
+def parse_dates(df):
+    """Parses "Purchase Date" and "Creation Date" into datetimes."""
+    if "Purchase Date" in df.columns:
+        dates = df['Purchase Date']
+        if not pd.api.types.is_numeric_dtype(dates):
+            # Text is object or str dtype (pandas >= 3).
+            # Force a 20xx century on the year, e.g. "01/31/0013" -> "01/31/2013"
+            dates = dates.str[:-4] + '20' + dates.str[-2:]
+        df['Purchase Date'] = pd.to_datetime(dates, format=PURCHASE_DATE_FORMAT, errors='coerce')
+    if "Creation Date" in df.columns:
+        df['Creation Date'] = pd.to_datetime(df['Creation Date'], format=CREATION_DATE_FORMAT, errors='coerce')
+    return df
+
+
+def standardize_fiscal_year(df):
+    """Prefixes fiscal year labels with "FY" and stores them as a category."""
+    if "Fiscal Year" in df.columns:
+        # Only a handful of distinct labels exist, so map those instead of every row
+        codes, uniques = pd.factorize(df["Fiscal Year"], use_na_sentinel=False)
+        labels = np.array(
+            [f"FY{x}" if "FY" not in str(x) else x for x in uniques], dtype=object
+        )
+        df["Fiscal Year"] = pd.Series(labels[codes], index=df.index).astype("category")
+    return df
+
+
+def convert_categories(df):
+    """Converts low-cardinality text columns to categories."""
+    for col in CATEGORICAL_COLUMNS:
+        if col in df.columns:
+            df[col] = df[col].astype("category")
+    return df
+
+
+def clean_prices(df):
+    """Strips "$" and "," from the price columns and converts them to floats."""
+    for col in ["Unit Price", "Total Price"]:
+        if col in df.columns:
+            prices = df[col]
+            if not pd.api.types.is_numeric_dtype(prices):
+                # Text is object or str dtype (pandas >= 3). The .str accessor
+                # yields NaN for non-strings; keep those values as-is
+                stripped = prices.str.replace("$", "", regex=False).str.replace(",", "", regex=False)
+                prices = stripped.fillna(prices)
+            df[col] = prices.astype(float).fillna(0)
+    return df
+
+
+def recalculate_total_price(df):
+    """Recomputes "Total Price" as Quantity x Unit Price."""
+    if all(col in df.columns for col in ["Quantity", "Unit Price", "Total Price"]):
+        df["Total Price"] = df["Quantity"] * df["Unit Price"]
+    return df
+
+
+# Cleaning pipeline, in the order the steps are applied
+CLEANING_STEPS = [
+    ("drop_unused_columns", drop_unused_columns),
+    ("drop_duplicate_rows", drop_duplicate_rows),
+    ("fill_missing_values", fill_missing_values),
+    ("dedupe_purchase_orders", dedupe_purchase_orders),
+    ("parse_dates", parse_dates),
+    ("standardize_fiscal_year", standardize_fiscal_year),
+    ("convert_categories", convert_categories),
+    ("clean_prices", clean_prices),
+    ("recalculate_total_price", recalculate_total_price),
+]
+
+
+# Steps that need the whole dataset at once, applied after CLEANING_STEPS
+DATASET_STEPS = [
+    ("canonicalize_suppliers", canonicalize_suppliers),
+]
+
+
+def clean_rows(df):
+    """Applies CLEANING_STEPS, which only need the rows they are given."""
+    for _, step in CLEANING_STEPS:
+        df = step(df)
+    return df
+
+
+def finish_dataset(df):
+    """Applies DATASET_STEPS to the complete cleaned dataset."""
+    for _, step in DATASET_STEPS:
+        df = step(df)
+    return df
+
+
+def clean_and_process_data(df):
+    """
+    Cleans and processes procurement data, addressing missing values,
+    standardizing formats, and enhancing performance with type conversions.
+
+    Every step is vectorized; see CLEANING_STEPS and DATASET_STEPS for the
+    individual stages.
+
+    Args:
+        df (pd.DataFrame): Input raw DataFrame.
+
+    Returns:
+        pd.DataFrame: Cleaned and processed DataFrame.
+    """
+    return finish_dataset(clean_rows(df))
+
+
+def fingerprint(path, chunk_size=1 << 20):
+    """
+    Computes a fingerprint of the source CSV and the cleaning code version.
+
+    Args:
+        path (str): Path to the raw CSV file.
+        chunk_size (int): Number of bytes hashed per read.
+
+    Returns:
+        str: Hex digest identifying this (source file, cleaning code) pair.
+    """
+    digest = hashlib.sha256(f"cleaning-v{CLEANING_VERSION}-snapshot-v{SNAPSHOT_FORMAT}".encode())
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def snapshot_path(path, key):
+    """Returns the location of the cached snapshot for a source CSV and fingerprint."""
+    stem = os.path.splitext(os.path.basename(path))[0]
+    return os.path.join(config.DATA_CACHE_DIR, f"{stem}-{key[:16]}.feather")
+
+
+ARROW_STRING_TYPES = {
+    pa.string(): pd.StringDtype("pyarrow"),
+    pa.large_string(): pd.StringDtype("pyarrow"),
+}
+
+
+def share_categories(df, table):
+    """
+    Replaces the categories of text categoricals, which to_pandas decodes
+    into private Python strings, with the snapshot's Arrow dictionaries, so
+    they stay in the mapping like the codes.
+    """
+    columns = {}
+    for col in df.columns:
+        columns[col] = df[col]
+        column = table.column(col)
+        if not isinstance(df[col].dtype, pd.CategoricalDtype) or column.num_chunks != 1:
+            continue
+        dictionary = column.chunk(0).dictionary
+        if dictionary.type not in ARROW_STRING_TYPES:
+            continue
+        categories = pd.Index(pd.array(dictionary, dtype=ARROW_STRING_TYPES[dictionary.type]))
+        dtype = pd.CategoricalDtype(categories, ordered=df[col].cat.ordered)
+        columns[col] = pd.Categorical.from_codes(df[col].array.codes, dtype=dtype, validate=False)
+    # Assigning the columns one by one would copy them out of the mapping
+    return pd.DataFrame(columns, copy=False)
+
+
+def read_snapshot(path, shared=True):
+    """
+    Reads a cleaned snapshot back from its Feather (Arrow IPC) file.
+
+    The file is memory-mapped. With ``shared=True`` the DataFrame's columns
+    point straight into the mapping wherever Arrow allows it: numeric and
+    datetime columns without missing values, the codes and categories of
+    categoricals, and the Arrow-backed text columns. Columns with missing
+    values are copied into private memory. The mapped pages live in the OS
+    page cache, so every worker process mapping the same snapshot shares one
+    physical copy instead of holding its own.
+
+    Args:
+        path (str): Snapshot file written by write_snapshot.
+        shared (bool): Keep columns backed by the mapping rather than copying
+            them into private memory.
+    """
+    table = feather.read_table(path, memory_map=True)
+    # split_blocks avoids consolidating same-dtype columns into one new
+    # block, which would copy them out of the mapping. Text columns stay
+    # Arrow-backed, as optimize_dtypes left them.
+    df = table.to_pandas(split_blocks=shared, types_mapper=ARROW_STRING_TYPES.get)
+    return share_categories(df, table) if shared else df.copy(deep=True)
+
+
+def write_snapshot(df, path):
+    """
+    Writes a cleaned DataFrame to a typed Feather file.
+
+    The file is written under a temporary name and renamed into place so
+    that concurrent readers never observe a partially written snapshot.
+    """
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    # Uncompressed and in one record batch, so that readers can map the
+    # columns without decoding or concatenating them
+    df.reset_index(drop=True).to_feather(tmp_path, compression="uncompressed", chunksize=max(len(df), 1))
+    os.replace(tmp_path, path)
+
+
+@contextlib.contextmanager
+def snapshot_lock(path):
+    """
+    Holds an exclusive cross-process lock for building the snapshot at
+    ``path``, so that when several workers start together only the first
+    one cleans the CSV and the others wait and then map its snapshot.
+    """
+    if fcntl is None:
+        yield
+        return
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(f"{path}.lock", "w") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+class PurchaseOrderHashSet:
+    """
+    Compact set of 64-bit Purchase Order Number hashes.
+
+    Hashes are kept in a single sorted uint64 array (8 bytes per order), which
+    is far smaller than a Python set of the order number strings.
+    """
+
+    def __init__(self):
+        self._hashes = np.empty(0, dtype=np.uint64)
+
+    def __len__(self):
+        return len(self._hashes)
+
+    def add_unseen(self, hashes):
+        """
+        Adds hashes to the set.
+
+        Args:
+            hashes (np.ndarray): uint64 hashes, already unique within the batch.
+
+        Returns:
+            np.ndarray: Boolean mask of the hashes that were not in the set before.
+        """
+        if len(self._hashes):
+            positions = np.searchsorted(self._hashes, hashes).clip(max=len(self._hashes) - 1)
+            unseen = self._hashes[positions] != hashes
+        else:
+            unseen = np.ones(len(hashes), dtype=bool)
+        self._hashes = np.union1d(self._hashes, hashes[unseen])
+        return unseen
+
+
+def peak_rss_bytes():
+    """Returns the peak resident set size of this process, or None if unknown."""
+    try:
+        import resource
+    except ImportError:  # Not available on Windows
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is reported in bytes on macOS and in kilobytes elsewhere
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def unify_categories(chunks):
+    """
+    Gives every categorical column the same (sorted) categories in all chunks,
+    so concatenating the chunks keeps those columns categorical.
+    """
+    for col in chunks[0].columns:
+        if not all(isinstance(chunk[col].dtype, pd.CategoricalDtype) for chunk in chunks):
+            continue
+        categories = pd.Index([])
+        for chunk in chunks:
+            categories = categories.union(chunk[col].cat.categories)
+        for chunk in chunks:
+            chunk[col] = chunk[col].cat.set_categories(categories)
+    return chunks
+
+
+def stream_clean_csv(path, chunksize=None):
+    """
+    Reads and cleans the CSV in chunks, keeping peak memory bounded.
+
+    Only the columns kept by the cleaning pipeline are parsed, with explicit
+    dtypes. Each chunk goes through the regular CLEANING_STEPS, and purchase
+    orders already seen in earlier chunks are dropped using a hash set.
+    DATASET_STEPS then run on the combined result, so it matches
+    clean_and_process_data on the whole file.
+
+    Args:
+        path (str): Path to the raw CSV file.
+        chunksize (int): Rows per chunk; defaults to config.INGEST_CHUNKSIZE.
+
+    Returns:
+        pd.DataFrame: Cleaned and processed DataFrame.
+    """
+    started = time.perf_counter()
+    seen = PurchaseOrderHashSet()
+    chunks = []
+    raw_rows = 0
+
+    reader = pd.read_csv(
+        path,
+        usecols=lambda col: col not in COLUMNS_TO_DROP,
+        dtype=RAW_DTYPES,
+        chunksize=chunksize or config.INGEST_CHUNKSIZE,
+    )
+    for chunk in reader:
+        raw_rows += len(chunk)
+        chunk = clean_rows(chunk)
+        hashes = pd.util.hash_pandas_object(chunk['Purchase Order Number'], index=False).to_numpy()
+        chunks.append(chunk[seen.add_unseen(hashes)])
+
+    if not chunks:
+        # Header-only file: nothing to stream
+        return clean_and_process_data(pd.read_csv(path))
+
+    # Supplier canonicalization needs every spelling, so it runs once at the end
+    df = finish_dataset(pd.concat(unify_categories(chunks)))
+    peak = peak_rss_bytes()
+    logger.info(
+        "Streamed %d raw rows in %d chunks into %d clean rows in %.2fs, peak RSS %s",
+        raw_rows, len(chunks), len(df), time.perf_counter() - started,
+        f"{peak / 2**20:.1f} MiB" if peak is not None else "unknown"
+    )
+    return df
+
+
+def sort_by_creation_date(df):
+    """
+    Sorts rows by "Creation Date" (missing dates last) and renumbers them, so
+    date ranges map to contiguous row positions.
+    """
+    return df.sort_values("Creation Date", kind="stable", na_position="last", ignore_index=True)
+
+
+def read_and_clean(path):
+    """Reads and cleans the CSV using the configured INGEST_MODE."""
+    if config.INGEST_MODE == "streaming":
+        with span("read_and_clean_csv"):
+            df = stream_clean_csv(path)
+    else:
+        with span("read_csv"):
+            raw = pd.read_csv(path)
+        with span("clean"):
+            df = clean_and_process_data(raw)
+    with span("optimize_dtypes"):
+        df, report = optimize_dtypes(sort_by_creation_date(df))
+    logger.info("Memory footprint by column:\n%s", format_report(report))
+    return df
+
+
+def load_dataset(path, use_cache=True, key=None):
+    """
+    Loads the cleaned dataset, using the columnar snapshot when it is fresh.
+
+    Args:
+        path (str): Path to the raw CSV file.
+        use_cache (bool): Whether to read and write the snapshot cache.
+        key (str): Precomputed fingerprint of ``path``, if already known.
+
+    Returns:
+        pd.DataFrame: Cleaned and processed DataFrame.
+    """
+    if not use_cache:
+        return read_and_clean(path)
+
+    cache_path = snapshot_path(path, key or fingerprint(path))
+    with snapshot_lock(cache_path):
+        if os.path.exists(cache_path):
+            try:
+                with span("read_snapshot"):
+                    return read_snapshot(cache_path, shared=config.DATA_SHARED)
+            except Exception:
+                logger.exception("Discarding unreadable snapshot %s", cache_path)
+
+        df = read_and_clean(path)
+        try:
+            with span("write_snapshot"):
+                write_snapshot(df, cache_path)
+        except Exception:
+            # A failed cache write must never prevent the dataset from loading
+            logger.exception("Could not write snapshot %s", cache_path)
+            return df
+
+    if not config.DATA_SHARED:
+        return df
+    # Swap the freshly cleaned private frame for the shared mapping, so this
+    # worker doesn't keep its own copy either
+    try:
+        return read_snapshot(cache_path)
+    except Exception:
+        logger.exception("Could not map snapshot %s", cache_path)
+        return df
+
+
+def check_memory_budget(df):
+    """
+    Measures the frame's memory and enforces config.MEMORY_BUDGET_MB.
+
+    Returns:
+        dict: Bytes per column.
+
+    Raises:
+        MemoryError: If the frame is larger than the budget.
+    """
+    usage = df.memory_usage(deep=True, index=False)
+    total = int(usage.sum())
+    budget = config.MEMORY_BUDGET_MB * 2**20
+    if budget and total > budget:
+        raise MemoryError(
+            f"Cleaned dataset needs {total / 2**20:,.1f} MiB, "
+            f"over the {config.MEMORY_BUDGET_MB:,} MiB budget"
+        )
+    return {col: int(size) for col, size in usage.items()}
+
+
+class DatasetStore:
+    """
+    Process-wide holder for the cleaned procurement DataFrame.
+
+    The dataset is loaded and cleaned once (at application startup) and then
+    shared by every request. Readers get a shallow copy of the frame so that
+    column assignments made by generated query code never leak back into the
+    shared data. Each (re)load bumps ``version`` so callers can tell when the
+    underlying data has changed.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.version = 0
+        # Fingerprint of the loaded CSV; None when caching is off or rows were appended
+        self.key = None
+        # Bytes per column of the loaded frame
+        self.memory = {}
+        self._df = None
+        self._lock = threading.Lock()
+        # Values derived from the frame, memoized per dataset version
+        self._derived = {}
+        self._build_lock = threading.RLock()
+
+    @property
+    def loaded(self) -> bool:
+        return self._df is not None
+
+    def load(self):
+        """
+        Loads the cleaned dataset for ``self.path`` and swaps it in.
+
+        A cached columnar snapshot is used when one exists for the current
+        CSV contents and cleaning code; otherwise the CSV is parsed and
+        cleaned and the snapshot is refreshed.
+
+        Returns:
+            pd.DataFrame: The newly loaded, cleaned DataFrame.
+        """
+        started = time.perf_counter()
+        key = fingerprint(self.path) if config.DATA_CACHE_ENABLED else None
+        df = load_dataset(self.path, use_cache=config.DATA_CACHE_ENABLED, key=key)
+
+        memory = check_memory_budget(df)
+
+        with self._lock:
+            self._df = df
+            self.key = key
+            self.memory = memory
+            self.version += 1
+            self._derived = {}
+
+        logger.info(
+            "Loaded %d rows from %s in %.2fs (version %d)",
+            len(df), self.path, time.perf_counter() - started, self.version
+        )
+        return df
+
+    def reload(self):
+        """Reloads the dataset from disk, replacing the current frame."""
+        return self.load()
+
+    @property
+    def df(self) -> pd.DataFrame:
+        """
+        Read-only view of the cleaned DataFrame.
+
+        Raises:
+            RuntimeError: If the dataset has not been loaded yet.
+        """
+        df = self._df
+        if df is None:
+            raise RuntimeError("Dataset has not been loaded yet.")
+        return df.copy(deep=False)
+
+    def snapshot(self):
+        """
+        Returns the current frame together with its version, read atomically.
+
+        Returns:
+            tuple[pd.DataFrame, int]: Read-only view of the frame and its version.
+        """
+        with self._lock:
+            df, version = self._df, self.version
+        if df is None:
+            raise RuntimeError("Dataset has not been loaded yet.")
+        return df.copy(deep=False), version
+
+    def artifact_path(self, suffix):
+        """
+        Returns where to persist an artifact built from the loaded dataset,
+        next to its snapshot, or None if it must not be persisted.
+
+        Args:
+            suffix (str): File suffix, e.g. ".text-index.npz".
+        """
+        key = self.key
+        if key is None:
+            return None
+        return os.path.splitext(snapshot_path(self.path, key))[0] + suffix
+
+    def reset_locks(self):
+        """Replaces the locks with fresh ones, in a forked child process."""
+        self._lock = threading.Lock()
+        self._build_lock = threading.RLock()
+
+    def derived(self, name, builder, updater=None):
+        """
+        Returns a value computed from the dataset once per dataset version.
+
+        Args:
+            name (str): Cache key for the derived value.
+            builder (callable): Called as ``builder(df)`` on a cache miss.
+            updater (callable): Optional ``updater(value, new_rows)`` used by
+                append() to update the value incrementally instead of
+                rebuilding it from the whole frame.
+
+        Returns:
+            The memoized result of ``builder`` for the current version.
+        """
+        df, version = self.snapshot()
+        entry = self._derived.get(name)
+        if entry is not None and entry[0] == version:
+            return entry[1]
+
+        with self._build_lock:
+            # Another thread may have built it while we were waiting
+            entry = self._derived.get(name)
+            if entry is not None and entry[0] == version:
+                return entry[1]
+            value = builder(df)
+            with self._lock:
+                if self.version == version:
+                    self._derived[name] = (version, value, updater)
+            return value
+
+    def append(self, raw):
+        """
+        Cleans new raw rows and appends them to the dataset.
+
+        Purchase orders that are already loaded are skipped. New supplier
+        spellings are matched to existing suppliers without renaming them
+        (see extend_suppliers). Derived values registered with an updater
+        are updated from the new rows alone; all others are rebuilt on next
+        use, as are all of them when the new rows merge existing suppliers.
+        Appended rows live in memory only and are replaced by the CSV
+        contents on the next reload.
+
+        Args:
+            raw (pd.DataFrame): Rows in the raw CSV layout.
+
+        Returns:
+            pd.DataFrame: The cleaned rows that were actually appended.
+        """
+        new_rows = clean_rows(raw)
+        with self._build_lock:
+            with self._lock:
+                current = self._df
+            if current is None:
+                raise RuntimeError("Dataset has not been loaded yet.")
+
+            known = current['Purchase Order Number'].astype(str)
+            new_rows = new_rows[~new_rows['Purchase Order Number'].astype(str).isin(known)]
+            existing = current.copy(deep=False)
+            # New spellings join existing suppliers, whose IDs and names stay
+            extended = extend_suppliers(existing, new_rows)
+            if extended is not None:
+                new_rows = extended
+                existing['Supplier Name'] = existing['Supplier Name'].cat.set_categories(
+                    new_rows['Supplier Name'].cat.categories
+                )
+                df = pd.concat(unify_categories([existing, new_rows]), ignore_index=True)
+            else:
+                # The new rows merge existing suppliers: re-run the
+                # whole-dataset steps, which may rename suppliers
+                existing['Supplier Name'] = existing['Supplier Name'].astype(str)
+                df = finish_dataset(pd.concat(unify_categories([existing, new_rows]), ignore_index=True))
+                new_rows = df.iloc[len(existing):]
+                logger.info("Appended rows changed existing suppliers; derived values will be rebuilt")
+            # Stable sort: the existing rows are already in order
+            df, _ = optimize_dtypes(sort_by_creation_date(df))
+            memory = check_memory_budget(df)
+
+            # Updaters only see the new rows, so they can't apply renamed
+            # suppliers to existing values
+            derived = {}
+            for name, (version, value, updater) in self._derived.items():
+                if extended is not None and version == self.version and updater is not None:
+                    derived[name] = (self.version + 1, updater(value, new_rows), updater)
+
+            with self._lock:
+                self._df = df
+                self.key = None
+                self.memory = memory
+                self.version += 1
+                self._derived = derived
+
+        logger.info("Appended %d rows (version %d)", len(new_rows), self.version)
+        return new_rows
+
+
+store = DatasetStore(config.DATA_PATH)
+
+if hasattr(os, "register_at_fork"):
+    # Forked sandbox workers (see sandbox.py) must not inherit a lock that a
+    # parent thread held at the moment of the fork
+    os.register_at_fork(after_in_child=store.reset_locks)
@@ -0,0 +1,109 @@
+import logging
+import numpy as np
+import pandas as pd
+
+
+logger = logging.getLogger(__name__)
+
+# Text columns with fewer distinct values than this share of rows become
+# categories; the rest become Arrow-backed strings
+CATEGORY_RATIO = 0.5
+
+# Measures that generated code does arithmetic on; they keep 64-bit dtypes so
+# that e.g. df["Quantity"] ** 2 or a sum of prices can't overflow or round
+MEASURE_COLUMNS = {"Quantity", "Unit Price", "Total Price"}
+
+# Categoricals whose codes carry meaning, so they stay categorical whatever
+# their cardinality: the codes of "Supplier Name" are the Supplier IDs (see
+# suppliers.canonicalize_suppliers)
+KEEP_CATEGORICAL = {"Supplier Name"}
+
+# Smallest integer type an integer column is downcast to
+MIN_INTEGER_DTYPE = np.int32
+
+
+def _downcast_integer(series):
+    series = pd.to_numeric(series, downcast="integer")
+    if series.dtype.itemsize < np.dtype(MIN_INTEGER_DTYPE).itemsize:
+        return series.astype(MIN_INTEGER_DTYPE)
+    return series
+
+
+def _compact_float(series):
+    values = series.to_numpy()
+    finite = values[~np.isnan(values)]
+    if len(finite) == len(values) and np.array_equal(finite, np.round(finite)):
+        # Whole numbers without gaps, e.g. Supplier Code
+        return _downcast_integer(series)
+    as_float32 = values.astype(np.float32)
+    if np.array_equal(as_float32.astype(np.float64), values, equal_nan=True):
+        return series.astype(np.float32)
+    # Prices with cents don't survive float32; keep float64
+    return series
+
+
+def _compact_text(series):
+    if series.nunique(dropna=False) < CATEGORY_RATIO * max(len(series), 1):
+        return series.astype("category")
+    return series.astype(pd.StringDtype("pyarrow"))
+
+
+def optimize_dtypes(df):
+    """
+    Converts every column to the smallest dtype that holds its values exactly.
+
+    - MEASURE_COLUMNS are left as they are.
+    - Whole-number floats without missing values become the smallest integer
+      type of at least 32 bits; other floats become float32 only if that is
+      lossless.
+    - Integers are downcast, to 32 bits at the smallest.
+    - Low-cardinality text becomes a category; other text, including
+      categories of text with too many distinct values (except
+      KEEP_CATEGORICAL), becomes an Arrow-backed string, which stores
+      characters in one contiguous buffer instead of one Python object per
+      value.
+
+    Args:
+        df (pd.DataFrame): Cleaned DataFrame.
+
+    Returns:
+        tuple[pd.DataFrame, pd.DataFrame]: The optimized frame and a per-column
+        report of dtypes and bytes before and after.
+    """
+    before = df.memory_usage(deep=True, index=False)
+    dtypes_before = df.dtypes.astype(str)
+
+    for col in df.columns:
+        series = df[col]
+        if col in MEASURE_COLUMNS:
+            continue
+        if pd.api.types.is_bool_dtype(series):
+            continue
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            # Near-unique categories, e.g. Purchase Order Number, cost more
+            # than the strings themselves
+            if col not in KEEP_CATEGORICAL and pd.api.types.is_string_dtype(series.cat.categories):
+                df[col] = _compact_text(series)
+        elif pd.api.types.is_float_dtype(series):
+            df[col] = _compact_float(series)
+        elif pd.api.types.is_integer_dtype(series):
+            df[col] = _downcast_integer(series)
+        elif series.dtype == object or isinstance(series.dtype, pd.StringDtype):
+            df[col] = _compact_text(series)
+
+    report = pd.DataFrame({
+        "dtype_before": dtypes_before,
+        "dtype_after": df.dtypes.astype(str),
+        "bytes_before": before,
+        "bytes_after": df.memory_usage(deep=True, index=False),
+    })
+    return df, report
+
+
+def format_report(report):
+    """Renders an optimize_dtypes report as a table with a totals line."""
+    table = report.copy()
+    table.loc["TOTAL"] = ["", "", report["bytes_before"].sum(), report["bytes_after"].sum()]
+    for col in ["bytes_before", "bytes_after"]:
+        table[col] = (table[col] / 2**20).map("{:,.1f} MiB".format)
+    return table.to_string()
@@ -0,0 +1,128 @@
+import threading
+import time
+import logging
+import httpx
+from llama_index.llms.groq.base import Groq  # Make sure this path is correct
+from llama_index.experimental.query_engine.pandas.pandas_query_engine import (
+    DEFAULT_INSTRUCTION_STR,
+    DEFAULT_RESPONSE_SYNTHESIS_PROMPT,
+)
+from llama_index.experimental.query_engine.pandas.prompts import DEFAULT_PANDAS_PROMPT
+
+import config
+from pandas_exec import extract_code
+
+
+logger = logging.getLogger(__name__)
+
+
+class QueryEngineProvider:
+    """
+    Owns the long-lived Groq client of this worker and runs the two LLM
+    steps of PandasQueryEngine.query with it.
+
+    The Groq client keeps a pooled keep-alive HTTP connection to the LLM
+    endpoint for the whole process. It is safe to share between threads,
+    and creating it is guarded by a lock.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._http_client = None
+        self._llm = None
+        self.stats = {
+            "client_builds": 0,
+            "client_reuses": 0,
+            "setup_seconds": 0.0,
+            "setup_seconds_saved": 0.0,
+        }
+
+    def _build_llm(self):
+        if config.LLM_PROVIDER == "stub":
+            # Offline benchmarks: canned code after a fixed delay, no API key
+            from stub_llm import StubLLM
+
+            kwargs = {"latency": config.STUB_LLM_LATENCY, "jitter": config.STUB_LLM_JITTER}
+            if config.STUB_LLM_RESPONSES:
+                return StubLLM.from_file(config.STUB_LLM_RESPONSES, **kwargs)
+            return StubLLM(**kwargs)
+
+        self._http_client = httpx.Client(
+            timeout=httpx.Timeout(config.LLM_TIMEOUT),
+            limits=httpx.Limits(
+                max_connections=config.LLM_MAX_CONNECTIONS,
+                max_keepalive_connections=config.LLM_MAX_CONNECTIONS,
+                keepalive_expiry=config.LLM_KEEPALIVE_EXPIRY,
+            ),
+        )
+        return Groq(
+            model=config.model,
+            api_key=config.api_key,
+            timeout=config.LLM_TIMEOUT,
+            max_retries=config.LLM_MAX_RETRIES,
+            reuse_client=True,
+            http_client=self._http_client,
+        )
+
+    def _client(self, call=False):
+        with self._lock:
+            if self._llm is None:
+                started = time.perf_counter()
+                self._llm = self._build_llm()
+                self.stats["client_builds"] += 1
+                self.stats["setup_seconds"] = time.perf_counter() - started
+                logger.info("Built LLM client in %.3fs", self.stats["setup_seconds"])
+            elif call:
+                # Count the client build this call didn't have to repeat
+                self.stats["client_reuses"] += 1
+                self.stats["setup_seconds_saved"] += self.stats["setup_seconds"]
+            return self._llm
+
+    @property
+    def llm(self):
+        """The shared Groq client, created on first use."""
+        return self._client()
+
+    def generate_code(self, df, query):
+        """
+        Asks the LLM for pandas code answering ``query``, without running it.
+
+        Uses PandasQueryEngine's default prompt, so the code is what
+        PandasQueryEngine.query would have generated.
+
+        Args:
+            df (pd.DataFrame): The frame the code will run on.
+            query (str): Context and user question.
+
+        Returns:
+            str: The extracted pandas code.
+        """
+        output = self._client(call=True).predict(
+            DEFAULT_PANDAS_PROMPT, df_str=str(df.head(5)), query_str=query,
+            instruction_str=DEFAULT_INSTRUCTION_STR,
+        )
+        return extract_code(output)
+
+    def synthesize(self, question, code, output):
+        """
+        Streams a natural-language answer to ``question`` from the pandas
+        code and its output.
+
+        Yields:
+            str: Pieces of the answer as the LLM produces them.
+        """
+        yield from self._client(call=True).stream(
+            DEFAULT_RESPONSE_SYNTHESIS_PROMPT,
+            query_str=question, pandas_instructions=code, pandas_output=output,
+        )
+
+    def close(self):
+        """Closes the pooled HTTP connections."""
+        with self._lock:
+            if self._http_client is not None:
+                self._http_client.close()
+            self._http_client = None
+            self._llm = None
+
+
+engines = QueryEngineProvider()
@@ -0,0 +1,119 @@
+import json
+import os
+import threading
+import logging
+from collections import OrderedDict
+
+import config
+from answer_cache import normalize_query
+from dataset import snapshot_lock
+
+
+logger = logging.getLogger(__name__)
+
+
+class ExpressionCache:
+    """
+    Persistent cache of question -> validated pandas code.
+
+    Unlike the answer cache this is not keyed by dataset version: the code
+    stays valid across reloads and is simply re-executed on the new frame,
+    which is far cheaper than asking the LLM again. Entries are written to
+    a JSON file so they also survive worker restarts.
+
+    The file is shared by all worker processes: every change is applied to
+    the file's current contents under a cross-process lock (read, change,
+    write to a temporary file, rename), so no worker overwrites entries
+    another one added. A miss re-reads the file when it has changed, which
+    picks up code generated by other workers.
+    """
+
+    def __init__(self, path, max_entries=5000):
+        self.path = path
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._mtime = None
+        self._entries = self._read()
+        self.stats = {"hits": 0, "misses": 0, "invalidations": 0}
+
+    def _file_mtime(self):
+        try:
+            return os.stat(self.path).st_mtime_ns
+        except OSError:
+            return None
+
+    def _read(self):
+        self._mtime = self._file_mtime()
+        if self._mtime is None:
+            return OrderedDict()
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                return OrderedDict(json.load(f))
+        except (OSError, ValueError):
+            logger.exception("Ignoring unreadable expression cache %s", self.path)
+            return OrderedDict()
+
+    def _write(self, entries):
+        # Write to a temporary file and rename so readers never see a partial file
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(entries, f, indent=1)
+        os.replace(tmp_path, self.path)
+        self._mtime = self._file_mtime()
+
+    @staticmethod
+    def _key(question, target):
+        # Code written against the cube doesn't run on the dataset and vice versa
+        normalized = normalize_query(question)
+        return normalized if target == "dataset" else f"{target}:{normalized}"
+
+    def get(self, question, target="dataset"):
+        """Returns the cached pandas code for ``question`` on ``target``, or None."""
+        key = self._key(question, target)
+        with self._lock:
+            code = self._entries.get(key)
+            if code is None and self._file_mtime() != self._mtime:
+                # Another worker has written the file since we last read it
+                self._entries = self._read()
+                code = self._entries.get(key)
+            self.stats["hits" if code is not None else "misses"] += 1
+            return code
+
+    def put(self, question, code, target="dataset"):
+        """Stores validated pandas code for ``question`` and persists the cache."""
+        key = self._key(question, target)
+        with self._lock:
+            if self._entries.get(key) == code:
+                return
+
+            def change(entries):
+                entries[key] = code
+                entries.move_to_end(key)
+                while len(entries) > self.max_entries:
+                    entries.popitem(last=False)
+
+            self._update(change)
+
+    def invalidate(self, question, target="dataset"):
+        """Drops the code for ``question``, e.g. when it no longer runs."""
+        key = self._key(question, target)
+        with self._lock:
+            if key in self._entries:
+                self.stats["invalidations"] += 1
+                self._update(lambda entries: entries.pop(key, None))
+
+    def _update(self, change):
+        """Applies ``change`` to the file's current entries, then to ours."""
+        try:
+            with snapshot_lock(self.path):
+                self._entries = self._read()
+                change(self._entries)
+                self._write(self._entries)
+        except OSError:
+            # Persistence is best effort; the in-memory cache still works
+            logger.exception("Could not write expression cache %s", self.path)
+            change(self._entries)
+
+
+expression_cache = ExpressionCache(config.EXPRESSION_CACHE_PATH, max_entries=config.EXPRESSION_CACHE_SIZE)
@@ -0,0 +1,282 @@
+import re
+import logging
+import pandas as pd
+
+from answer_cache import normalize_query
+from pandas_exec import serialize_result
+
+
+logger = logging.getLogger(__name__)
+
+MONTHS = {
+    name: number for number, name in enumerate(
+        ["january", "february", "march", "april", "may", "june", "july",
+         "august", "september", "october", "november", "december"], start=1
+    )
+}
+
+MEASURE = (
+    r"(?P<measure>total spending|spending|spend|total expenditure|expenditure|"
+    r"total revenue|revenue|money|number of purchase orders|number of orders|"
+    r"purchase orders|orders)"
+)
+CALCARD = r"(?P<calcard> (?:created |made |paid )?(?:using|with|by) calcard)?"
+PERIOD = r"(?: (?:in|during|for) (?P<period>(?:fy ?|fiscal year )?\d{4}))?"
+MONTH_PERIOD = (
+    r"(?P<period>q[1-4] (?:of )?\d{4}|the (?:first|second) half of \d{4}|"
+    r"(?:" + "|".join(MONTHS) + r") \d{4}|\d{4})"
+)
+
+
+def build_aggregates(df, time_index):
+    """
+    Precomputes the group-bys the fast path answers from.
+
+    Args:
+        df (pd.DataFrame): Cleaned procurement data.
+        time_index (TimeIndex): Creation Date index of the same data.
+
+    Returns:
+        dict: The ``time_index`` with its ``monthly`` rollup, and
+        per-``Department Name``/``Supplier Name`` counts and totals by
+        calendar year, fiscal year and CalCard use.
+    """
+    created = df["Creation Date"]
+    prices = df["Total Price"]
+
+    keys = {
+        "Year": created.dt.year.rename("Year"),
+        "Fiscal Year": df["Fiscal Year"],
+        "CalCard": df["CalCard"].astype(str).str.upper() == "YES",
+    }
+    entities = {}
+    for dim in ["Department Name", "Supplier Name"]:
+        # Keep rows with a missing date or fiscal year: they still count
+        # towards the unfiltered totals
+        entities[dim] = prices.groupby(
+            [df[dim], keys["Year"], keys["Fiscal Year"], keys["CalCard"]],
+            observed=True, dropna=False,
+        ).agg(orders="size", total="sum")
+
+    return {"time_index": time_index, "monthly": time_index.rollups["monthly"], "entities": entities}
+
+
+def render(series):
+    """Renders a result the way pandas output from the query engine looks."""
+    return series.rename_axis(None).to_string()
+
+
+def period_label(period):
+    if period.freqstr.startswith("Q"):
+        return f"Q{period.quarter} {period.year}"
+    return period.strftime("%B %Y")
+
+
+def parse_month_period(text):
+    """
+    Parses "q1 2015", "january 2013", "the second half of 2013" or "2013".
+
+    Returns:
+        tuple[pd.Period, pd.Period]: First and last month of the period.
+    """
+    text = text.replace(" of ", " ")
+    match = re.fullmatch(r"q([1-4]) (\d{4})", text)
+    if match:
+        quarter = pd.Period(f"{match[2]}Q{match[1]}", freq="Q")
+        return quarter.asfreq("M", "start"), quarter.asfreq("M", "end")
+    match = re.fullmatch(r"the (first|second) half (\d{4})", text)
+    if match:
+        first = 1 if match[1] == "first" else 7
+        start = pd.Period(year=int(match[2]), month=first, freq="M")
+        return start, start + 5
+    match = re.fullmatch(r"([a-z]+) (\d{4})", text)
+    if match:
+        month = pd.Period(year=int(match[2]), month=MONTHS[match[1]], freq="M")
+        return month, month
+    year = int(text)
+    return pd.Period(year=year, month=1, freq="M"), pd.Period(year=year, month=12, freq="M")
+
+
+def months_between(monthly, start, end):
+    return monthly[(monthly.index >= start) & (monthly.index <= end)]
+
+
+def entity_totals(aggregates, dim, measure, period=None, calcard=False):
+    """Sums the per-entity aggregates after applying year/fiscal year/CalCard filters."""
+    table = aggregates["entities"][dim]
+    mask = pd.Series(True, index=table.index)
+    if calcard:
+        mask &= table.index.get_level_values("CalCard")
+    if period:
+        year = re.search(r"\d{4}", period)[0]
+        if period[0].isdigit():
+            mask &= table.index.get_level_values("Year") == int(year)
+        else:
+            # "FY2014" is the fiscal year ending in 2014, e.g. "FY2013-2014"
+            fiscal_years = table.index.get_level_values("Fiscal Year").astype(str)
+            mask &= fiscal_years.str.endswith(year)
+    column = "orders" if "order" in measure else "total"
+    return table.loc[mask.to_numpy(), column].groupby(level=dim, observed=True).sum()
+
+
+def top_entities(match, aggregates):
+    dim = "Department Name" if match["dim"].startswith("department") else "Supplier Name"
+    totals = entity_totals(
+        aggregates, dim, match["measure"] or "spending", match["period"], bool(match["calcard"])
+    )
+    n = int(match.groupdict().get("n") or 1)
+    return totals.nlargest(n)
+
+
+def totals_by_year(match, aggregates):
+    if match["fiscal"]:
+        table = aggregates["entities"]["Department Name"]
+        totals = table["total"].groupby(level="Fiscal Year", observed=True).sum()
+        if match["start"]:
+            # Like entity_totals, a fiscal year counts as the year it ends in
+            years = totals.index.astype(str).str.findall(r"\d{4}")
+            in_range = [
+                bool(found) and int(match["start"]) <= int(found[-1]) <= int(match["end"])
+                for found in years
+            ]
+            totals = totals[in_range]
+        return totals
+    monthly = aggregates["monthly"]
+    totals = monthly["total"].groupby(monthly.index.year).sum()
+    if match["start"]:
+        totals = totals.loc[int(match["start"]):int(match["end"])]
+    return totals
+
+
+def monthly_counts(match, aggregates):
+    start, end = parse_month_period(match["year"])
+    months = months_between(aggregates["monthly"], start, end)
+    return months["orders"].rename(index=period_label)
+
+
+def quarterly(aggregates, year, column):
+    monthly = aggregates["monthly"]
+    if year:
+        start, end = parse_month_period(year)
+        monthly = months_between(monthly, start, end)
+    return monthly[column].groupby(monthly.index.asfreq("Q")).sum()
+
+
+def top_quarter(match, aggregates):
+    totals = quarterly(aggregates, match["year"], "total")
+    return totals.nlargest(1).rename(index=period_label)
+
+
+def quarterly_trend(match, aggregates):
+    column = "orders" if "order" in match["measure"] else "total"
+    return quarterly(aggregates, match["year"], column).rename(index=period_label)
+
+
+def compare_quarters(match, aggregates):
+    totals = quarterly(aggregates, match["year"], "total").rename(index=period_label)
+    wanted = [f"Q{match['q1']} {match['year']}", f"Q{match['q2']} {match['year']}"]
+    return totals.reindex(wanted, fill_value=0)
+
+
+def period_total(match, aggregates):
+    start, end = parse_month_period(match["period"])
+    # Two binary searches over the sorted Creation Date index, no scan
+    summary = aggregates["time_index"].summary(start.start_time, (end + 1).start_time)
+    column = "orders" if "order" in match["measure"] else "total"
+    label = match["period"].replace("the ", "").title()
+    return pd.Series({label: summary[column]})
+
+
+def average_monthly(match, aggregates):
+    start, end = parse_month_period(match["year"])
+    months = months_between(aggregates["monthly"], start, end)
+    return pd.Series({f"Average monthly expenditure {match['year']}": months["total"].mean()})
+
+
+def monthly_trend(match, aggregates):
+    start, _ = parse_month_period(match["start"])
+    _, end = parse_month_period(match["end"])
+    months = months_between(aggregates["monthly"], start, end)
+    return months["total"].rename(index=period_label)
+
+
+def calcard_total(match, aggregates):
+    measure = match["measure"] or match["spend"]
+    totals = entity_totals(aggregates, "Department Name", measure, match["period"], calcard=True)
+    label = "CalCard " + ("orders" if "order" in measure else "spending")
+    if match["period"]:
+        label += f" {match['period'].upper()}"
+    return pd.Series({label: totals.sum()})
+
+
+# (pattern, handler) pairs, matched in order against the normalized question
+INTENTS = [
+    (rf"(?:which|what) (?P<dim>department|supplier) (?:had|has|spent|received|got|made)(?: the)? "
+     rf"(?:highest|most|largest)(?: {MEASURE})?{CALCARD}{PERIOD}", top_entities),
+    (rf"(?:(?:list|show|find|give me|what are|which are) )?(?:the )?top (?P<n>\d+) "
+     rf"(?P<dim>departments|suppliers) (?:by|with the (?:highest|most)) {MEASURE}{CALCARD}{PERIOD}", top_entities),
+    (r"(?:show |what (?:is|was|were) )?(?:the )?total (?:expenditure|spending|spend) "
+     r"(?:by|for each|per) (?P<fiscal>fiscal )?year(?: from (?P<start>\d{4}) to (?P<end>\d{4}))?", totals_by_year),
+    (r"how many (?:purchase )?orders were (?:created|placed) (?:in )?each month (?:of|in) (?P<year>\d{4})",
+     monthly_counts),
+    (r"(?:show )?(?:me )?the monthly breakdown of (?:the )?(?:total )?number of (?:purchase )?orders "
+     r"(?:for|in) (?P<year>\d{4})", monthly_counts),
+    (r"which quarter had the highest total (?:spending|expenditure)(?: in (?P<year>\d{4}))?", top_quarter),
+    (r"how (?:has|did) the total (?P<measure>spending|expenditure) change[d]? over the quarters "
+     r"(?:of|in) (?P<year>\d{4})", quarterly_trend),
+    (r"what (?:is|was) the trend of (?P<measure>order) creation across (?:all )?(?:the )?quarters "
+     r"(?:of|in) (?P<year>\d{4})", quarterly_trend),
+    (r"compare the (?:total )?(?:spending|expenditure) in q(?P<q1>[1-4]) and q(?P<q2>[1-4]) "
+     r"(?:of )?(?P<year>\d{4})", compare_quarters),
+    (rf"how many (?P<measure>(?:purchase )?orders) were (?:created|placed) in {MONTH_PERIOD}", period_total),
+    (rf"what (?:is|was) the total (?P<measure>number of (?:purchase )?orders) (?:created |placed )?"
+     rf"in {MONTH_PERIOD}", period_total),
+    (rf"what (?:is|was) the total (?P<measure>expenditure|spending|spend) in {MONTH_PERIOD}", period_total),
+    (r"what (?:is|was) the average monthly (?:expenditure|spending|spend) in (?P<year>\d{4})", average_monthly),
+    (r"what (?:is|was) the trend of monthly (?:spending|expenditure) from "
+     r"(?P<start>[a-z]+ \d{4}) to (?P<end>[a-z]+ \d{4})", monthly_trend),
+    (rf"(?:how many (?P<measure>(?:purchase )?orders)|what (?:is|was) the total (?P<spend>spending|expenditure))"
+     rf" (?:were )?(?:made |paid )?(?:using|with|by) calcard{PERIOD}", calcard_total),
+]
+
+COMPILED_INTENTS = [(re.compile(pattern), handler) for pattern, handler in INTENTS]
+
+
+def match_intent(question):
+    """
+    Finds the fast-path intent matching ``question``.
+
+    Returns:
+        tuple[re.Match, callable] | None: The match and its handler, or None.
+    """
+    normalized = normalize_query(question)
+    for pattern, handler in COMPILED_INTENTS:
+        match = pattern.fullmatch(normalized)
+        if match:
+            return match, handler
+    return None
+
+
+def answer(question, aggregates):
+    """
+    Answers a templated aggregate question from precomputed group-bys.
+
+    Args:
+        question (str): The user's question.
+        aggregates (dict): Output of build_aggregates for the current dataset.
+
+    Returns:
+        tuple[str, dict] | None: The rendered answer and the handler's
+        Series serialized by serialize_result, or None if no intent matches
+        (or the handler fails), in which case the question goes to the LLM.
+    """
+    found = match_intent(question)
+    if found is None:
+        return None
+    match, handler = found
+    try:
+        result = handler(match, aggregates)
+        return render(result), serialize_result(result)
+    except Exception:
+        logger.exception("Fast path %s failed for %r", handler.__name__, question)
+        return None
@@ -0,0 +1,26 @@
+"""
+Gunicorn settings for running several API workers on one host:
+
+    gunicorn -c gunicorn.conf.py main:app
+
+Every worker memory-maps the same dataset snapshot (see DATA_SHARED in
+config.py), so adding workers adds throughput without adding a full copy
+of the dataset per worker.
+"""
+import os
+
+bind = os.getenv("BIND", "0.0.0.0:8000")
+workers = int(os.getenv("WEB_CONCURRENCY", "4"))
+worker_class = "uvicorn.workers.UvicornWorker"
+# Loading the dataset and warming up the engines can take a while
+timeout = int(os.getenv("WORKER_TIMEOUT", "300"))
+
+
+def on_starting(server):
+    # Build the snapshot once in the master before any worker starts, so
+    # workers only ever map it instead of racing to clean the CSV
+    import config
+    from dataset import load_dataset
+
+    if config.DATA_CACHE_ENABLED:
+        load_dataset(config.DATA_PATH)
@@ -0,0 +1,276 @@
+import os
+import time
+import contextlib
+import sqlite3
+import threading
+import logging
+from collections import OrderedDict, deque
+
+import config
+
+
+logger = logging.getLogger(__name__)
+
+
+class InMemoryHistory:
+    """
+    Chat history kept in this process only, as an LRU of chats.
+
+    Each chat keeps its last ``max_messages`` messages. Chats idle for longer
+    than ``ttl_seconds`` are evicted, and beyond ``max_chats`` the least
+    recently used chat is dropped. History is lost on restart and not shared
+    between workers; use SQLiteHistory for that.
+    """
+
+    def __init__(self, max_messages=200, ttl_seconds=0, max_chats=10000):
+        self.max_messages = max_messages
+        self.ttl_seconds = ttl_seconds
+        self.max_chats = max_chats
+        self._lock = threading.Lock()
+        # chat_id -> (last activity, deque of messages), oldest activity first
+        self._chats = OrderedDict()
+        # Sequence numbers increase across all chats and are never reused
+        self._seq = 0
+
+    def _evict(self, now):
+        while self._chats:
+            chat_id, (touched, _) = next(iter(self._chats.items()))
+            expired = self.ttl_seconds and now - touched > self.ttl_seconds
+            if not expired and len(self._chats) <= self.max_chats:
+                break
+            del self._chats[chat_id]
+
+    def append(self, chat_id, messages):
+        """
+        Appends messages to a chat.
+
+        Args:
+            chat_id (str): Chat to append to.
+            messages (list[dict]): Messages with ``role`` and ``message`` keys.
+        """
+        now = time.monotonic()
+        with self._lock:
+            entry = self._chats.pop(chat_id, None)
+            stored = entry[1] if entry else deque(maxlen=self.max_messages)
+            for m in messages:
+                self._seq += 1
+                stored.append({"seq": self._seq, "role": m["role"], "message": m["message"]})
+            self._chats[chat_id] = (now, stored)
+            self._evict(now)
+
+    def _touch(self, chat_id):
+        # Caller holds the lock; marks the chat as recently used
+        now = time.monotonic()
+        self._evict(now)
+        entry = self._chats.pop(chat_id, None)
+        if entry is None:
+            return None
+        self._chats[chat_id] = (now, entry[1])
+        return entry[1]
+
+    def get(self, chat_id, since=0, limit=None):
+        """
+        Returns the messages of a chat with a sequence number above ``since``,
+        oldest first.
+
+        Args:
+            chat_id (str): Chat to read.
+            since (int): Sequence number of the last message already seen.
+            limit (int): Maximum number of messages to return; None for all.
+
+        Returns:
+            list[dict]: Messages with ``seq``, ``role`` and ``message`` keys.
+        """
+        with self._lock:
+            stored = self._touch(chat_id)
+            if stored is None:
+                return []
+            messages = [dict(m) for m in stored if m["seq"] > since]
+        return messages[:limit] if limit is not None else messages
+
+    def head(self, chat_id):
+        """Returns the sequence number of the chat's newest message, or 0."""
+        with self._lock:
+            stored = self._touch(chat_id)
+            return stored[-1]["seq"] if stored else 0
+
+    def delete(self, chat_id):
+        """Deletes a chat's history."""
+        with self._lock:
+            self._chats.pop(chat_id, None)
+
+    def close(self):
+        pass
+
+
+class SQLiteHistory:
+    """
+    Chat history in a local SQLite database, shared by every worker on the host
+    and kept across restarts.
+
+    The database runs in WAL mode, so readers never block the writer and
+    concurrent workers can append at the same time. Messages are indexed by
+    ``(chat_id, id)``, so reading one chat never scans the others. Each
+    thread uses its own connection.
+
+    The per-chat cap is applied on every append. TTL and ``max_chats``
+    eviction run at most once every ``evict_interval`` seconds.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS chats (
+            chat_id TEXT PRIMARY KEY,
+            updated REAL NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS chats_updated ON chats (updated);
+        CREATE TABLE IF NOT EXISTS messages (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            chat_id TEXT NOT NULL REFERENCES chats (chat_id) ON DELETE CASCADE,
+            role TEXT NOT NULL,
+            message TEXT NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS messages_chat_id ON messages (chat_id, id);
+    """
+
+    def __init__(self, path, max_messages=200, ttl_seconds=0, max_chats=10000, evict_interval=60):
+        self.path = path
+        self.max_messages = max_messages
+        self.ttl_seconds = ttl_seconds
+        self.max_chats = max_chats
+        self.evict_interval = evict_interval
+        self._local = threading.local()
+        self._connections = []
+        self._connections_lock = threading.Lock()
+        self._next_eviction = 0.0
+
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        # Idempotent, so workers starting together can all run it
+        self._connection().executescript(self.SCHEMA)
+
+    def _connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            # Autocommit mode; transactions are opened explicitly below
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA foreign_keys=ON")
+            self._local.conn = conn
+            with self._connections_lock:
+                self._connections.append(conn)
+        return conn
+
+    @contextlib.contextmanager
+    def _transaction(self):
+        conn = self._connection()
+        # Take the write lock up front so concurrent writers queue on the
+        # busy timeout instead of failing to upgrade a read lock
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+    def _evict(self, conn, now):
+        if self.ttl_seconds:
+            conn.execute("DELETE FROM chats WHERE updated < ?", (now - self.ttl_seconds,))
+        conn.execute(
+            "DELETE FROM chats WHERE chat_id IN "
+            "(SELECT chat_id FROM chats ORDER BY updated DESC LIMIT -1 OFFSET ?)",
+            (self.max_chats,),
+        )
+
+    def append(self, chat_id, messages):
+        """
+        Appends messages to a chat in one transaction.
+
+        Args:
+            chat_id (str): Chat to append to.
+            messages (list[dict]): Messages with ``role`` and ``message`` keys.
+        """
+        now = time.time()
+        with self._transaction() as conn:
+            conn.execute(
+                "INSERT INTO chats (chat_id, updated) VALUES (?, ?) "
+                "ON CONFLICT (chat_id) DO UPDATE SET updated = excluded.updated",
+                (chat_id, now),
+            )
+            conn.executemany(
+                "INSERT INTO messages (chat_id, role, message) VALUES (?, ?, ?)",
+                [(chat_id, m["role"], m["message"]) for m in messages],
+            )
+            # Keep only the newest max_messages of this chat
+            conn.execute(
+                "DELETE FROM messages WHERE chat_id = ? AND id <= "
+                "(SELECT id FROM messages WHERE chat_id = ? ORDER BY id DESC LIMIT 1 OFFSET ?)",
+                (chat_id, chat_id, self.max_messages),
+            )
+            if now >= self._next_eviction:
+                self._next_eviction = now + self.evict_interval
+                self._evict(conn, now)
+
+    def _expired(self, conn, chat_id):
+        if not self.ttl_seconds:
+            return False
+        row = conn.execute("SELECT updated FROM chats WHERE chat_id = ?", (chat_id,)).fetchone()
+        return row is None or time.time() - row[0] > self.ttl_seconds
+
+    def get(self, chat_id, since=0, limit=None):
+        """
+        Returns the messages of a chat with a sequence number above ``since``,
+        oldest first. The message id is the sequence number.
+
+        Args:
+            chat_id (str): Chat to read.
+            since (int): Sequence number of the last message already seen.
+            limit (int): Maximum number of messages to return; None for all.
+
+        Returns:
+            list[dict]: Messages with ``seq``, ``role`` and ``message`` keys.
+        """
+        conn = self._connection()
+        if self._expired(conn, chat_id):
+            return []
+        # Served by the (chat_id, id) index: a seek, then an ordered range scan
+        rows = conn.execute(
+            "SELECT id, role, message FROM messages WHERE chat_id = ? AND id > ? ORDER BY id LIMIT ?",
+            (chat_id, since, -1 if limit is None else limit),
+        ).fetchall()
+        return [{"seq": seq, "role": role, "message": message} for seq, role, message in rows]
+
+    def head(self, chat_id):
+        """Returns the sequence number of the chat's newest message, or 0."""
+        conn = self._connection()
+        if self._expired(conn, chat_id):
+            return 0
+        row = conn.execute("SELECT max(id) FROM messages WHERE chat_id = ?", (chat_id,)).fetchone()
+        return row[0] or 0
+
+    def delete(self, chat_id):
+        """Deletes a chat's history."""
+        with self._transaction() as conn:
+            conn.execute("DELETE FROM chats WHERE chat_id = ?", (chat_id,))
+
+    def close(self):
+        """Closes every thread's connection."""
+        with self._connections_lock:
+            for conn in self._connections:
+                conn.close()
+            self._connections = []
+        self._local = threading.local()
+
+
+def create_history():
+    """Builds the history backend selected by config.HISTORY_BACKEND."""
+    limits = {
+        "max_messages": config.HISTORY_MAX_MESSAGES,
+        "ttl_seconds": config.HISTORY_TTL_SECONDS,
+        "max_chats": config.HISTORY_MAX_CHATS,
+    }
+    if config.HISTORY_BACKEND == "sqlite":
+        return SQLiteHistory(config.HISTORY_DB_PATH, **limits)
+    if config.HISTORY_BACKEND != "memory":
+        raise ValueError(f"Unknown HISTORY_BACKEND {config.HISTORY_BACKEND!r}")
+    return InMemoryHistory(**limits)
@@ -1,96 +1,48 @@
-from fastapi import FastAPI, APIRouter
-from fastapi.responses import JSONResponse
+import asyncio
+import contextvars
+import json
+import uuid
+import time
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, APIRouter, Header, HTTPException, Query, Request
+from fastapi.responses import JSONResponse, PlainTextResponse, Response, StreamingResponse
 from pydantic import BaseModel
-from typing import Dict, List
-import os
+from typing import Any, Dict, List, Optional
 import pandas as pd
-from dotenv import load_dotenv
-import httpx  # Import httpx for making HTTP requests
-from llama_index.llms.groq.base import Groq  # Make sure this path is correct
-from llama_index.experimental.query_engine import PandasQueryEngine
 
-
-# Load environment variables
-load_dotenv()
-
-api_key = os.getenv("GROQ_API_KEY")
-model = os.getenv("LLM_MODEL")
-
-def clean_and_process_data(df):
-    """
-    Cleans and processes procurement data, addressing missing values,
-    standardizing formats, and enhancing performance with type conversions.
-    
-    Args:
-        df (pd.DataFrame): Input raw DataFrame.
-        
-    Returns:
-        pd.DataFrame: Cleaned and processed DataFrame.
-    """
-    # Drop unnecessary columns
-    columns_to_drop = [
-        'LPA Number', 'Requisition Number', 'Sub-Acquisition Type', 
-        'Sub-Acquisition Method', 'Supplier Qualifications', 
-        'Supplier Zip Code', 'Classification Codes', 'Commodity Title', 
-        'Location', 'Normalized UNSPSC', 'Class', 'Class Title', 
-        'Family', 'Family Title', 'Segment', 'Segment Title'
-    ]
-    df.drop(columns=[col for col in columns_to_drop if col in df.columns], inplace=True)
-
-    # Remove duplicates
-    df.drop_duplicates(inplace=True)
-
-    # Handle missing values
-    df['Supplier Code'] = df['Supplier Code'].fillna(0).astype(float)
-    df['Supplier Name'] = df['Supplier Name'].fillna("N/A").astype("string")
-    df['Item Name'] = df['Item Name'].fillna("N/A").astype("string")
-    df['Item Description'] = df['Item Description'].fillna("N/A").astype("string")
-
-    # Optimize Purchase Order Number by converting to category
-    df['Purchase Order Number'] = df['Purchase Order Number'].astype('category')
-
-    # Drop duplicates based on Purchase Order Number
-    df.drop_duplicates(subset=['Purchase Order Number'], inplace=True)
-
-    # Parse dates
-    if "Purchase Date" in df.columns:
-        df['Purchase Date'] = pd.to_datetime(
-            [date[:-4] + '20' + date[-2:] if isinstance(date, str) else date for date in df['Purchase Date']],
-            errors='coerce'
-        )
-    if "Creation Date" in df.columns:
-        df['Creation Date'] = pd.to_datetime(df['Creation Date'], format='%d/%m/%Y', errors='coerce')
-
-    # Standardize Fiscal Year format
-    if "Fiscal Year" in df.columns:
-        df["Fiscal Year"] = df["Fiscal Year"].apply(lambda x: f"FY{x}" if "FY" not in str(x) else x).astype("category")
-
-    # Convert appropriate columns to categories for better performance
-    categorical_columns = [
-        "Acquisition Type", "Acquisition Method", "Department Name", "CalCard"
-    ]
-    for col in categorical_columns:
-        if col in df.columns:
-            df[col] = df[col].astype("category")
-
-    # Clean and convert numeric columns
-    for col in ["Unit Price", "Total Price"]:
-        if col in df.columns:
-            df[col] = df[col].replace('[\\$,]', '', regex=True).astype(float).fillna(0)
-
-    # Recalculate Total Price
-    if all(col in df.columns for col in ["Quantity", "Unit Price", "Total Price"]):
-        df["Total Price"] = df["Quantity"] * df["Unit Price"]
-
-    return df
-
-def generate_context(df):
+import cube
+import fast_path
+import sandbox
+from answer_cache import answer_cache, normalize_query
+from config import (
+    BATCH_CONCURRENCY, BATCH_MAX_QUESTIONS, CHAT_CONCURRENCY, CUBE_ENABLED, LOG_LEVEL, RICH_CONTEXT,
+    STREAM_SYNTHESIS,
+)
+from dataset import store, validate_raw_rows
+from engine import engines
+from expression_cache import expression_cache
+from history import create_history
+from metrics import CHAT_ANSWERS, HTTP_REQUESTS, HTTP_SECONDS, STAGE_SECONDS, render_metrics, request_id, span
+from pandas_exec import ARROW_MEDIA_TYPE, is_error, result_to_arrow
+from suppliers import build_supplier_dimension
+from text_index import SEARCH_HELP, get_text_index
+from timeseries import get_time_index
+
+
+# Every record carries the ID of the request it was logged for (see metrics.py)
+logging.basicConfig(level=LOG_LEVEL, format="%(asctime)s %(levelname)s [%(request_id)s] %(name)s: %(message)s")
+logger = logging.getLogger(__name__)
+
+def generate_context(df, rich=False):
     """
     Generates context for the LLM by summarizing the dataset structure and 
     including a sample of the data.
     
     Args:
         df (pd.DataFrame): The DataFrame to summarize.
+        rich (bool): Whether to include precomputed dataset statistics.
         
     Returns:
         str: A string representation of the dataset summary and sample.
@@ -103,95 +55,598 @@ def generate_context(df):
     for col in df.columns:
         context += f" - {col}: {df[col].dtype}, {df[col].nunique()} unique values\n"
 
+    if rich:
+        context += generate_statistics(df)
+
     # Add a sample of the data
     context += "\nSample Data:\n"
     context += df.head(5).to_string(index=False)
 
     return context
 
+def generate_statistics(df):
+    """
+    Summarizes date ranges, the most common categories and price quantiles.
+
+    Args:
+        df (pd.DataFrame): The DataFrame to summarize.
+
+    Returns:
+        str: A string representation of the statistics.
+    """
+    stats = "\nDataset Statistics:\n"
+    for col in df.select_dtypes(include="datetime").columns:
+        first, last = df[col].min(), df[col].max()
+        if pd.notnull(first):
+            stats += f" - {col}: from {first:%Y-%m-%d} to {last:%Y-%m-%d}\n"
+
+    for col in df.select_dtypes(include="category").columns:
+        counts = df[col].value_counts()
+        if len(counts) > 1000:
+            # Identifiers such as Purchase Order Number carry no useful ranking
+            continue
+        top = ", ".join(f"{value} ({count})" for value, count in counts.head(5).items())
+        stats += f" - Most common {col}: {top}\n"
+
+    for col in ["Unit Price", "Total Price"]:
+        if col in df.columns:
+            quantiles = df[col].quantile([0.25, 0.5, 0.75, 0.99])
+            values = ", ".join(f"p{int(q * 100)}={v:,.2f}" for q, v in quantiles.items())
+            stats += f" - {col}: min={df[col].min():,.2f}, {values}, max={df[col].max():,.2f}\n"
+
+    return stats
+
+def get_context(target="dataset"):
+    """Returns the context for ``target``, computed once per dataset version."""
+    def build(df):
+        with span("generate_context"):
+            if target == "cube":
+                return generate_context(cube.get_cube()) + cube.CUBE_NOTE
+            return generate_context(df, rich=RICH_CONTEXT) + SEARCH_HELP
+
+    return store.derived("context:cube" if target == "cube" else "context", build)
+
+def get_aggregates():
+    """Returns the fast-path group-bys, computed once per dataset version."""
+    return store.derived("fast_path_aggregates", lambda df: fast_path.build_aggregates(df, get_time_index()))
+
+def answer_locally(message: str, df, version, timings=None):
+    """
+    Tries every path that doesn't need the LLM: the answer cache, the
+    rule-based fast path, then previously generated pandas code re-executed
+    locally.
+
+    Args:
+        timings (dict): Seconds per stage of this request, added to.
+
+    Returns:
+        tuple[dict | None, str, pd.DataFrame]: The answer (``response``
+        text, serialized ``result``, ``source`` and, when code was run,
+        ``code``) or None, plus the target and frame to send the question to
+        otherwise.
+    """
+    # Repeated questions on the same dataset version are answered from cache
+    with span("answer_cache", timings):
+        cached = answer_cache.get(message, version)
+    if cached is not None:
+        return {**cached, "source": "answer_cache"}, None, None
+
+    # Templated aggregates are answered from precomputed group-bys
+    with span("fast_path", timings):
+        found = fast_path.answer(message, get_aggregates())
+    if found is not None:
+        output, result = found
+        return {"response": output, "result": result, "source": "fast_path"}, None, None
+
+    # Aggregate questions are answered from the cube rather than every row
+    target = "cube" if CUBE_ENABLED and cube.can_answer(message) else "dataset"
+    frame = cube.get_cube() if target == "cube" else df
+
+    # Re-run pandas code generated for this question earlier, e.g. before a reload
+    code = expression_cache.get(message, target)
+    if code is not None:
+        with span("execute", timings):
+            output, result = sandbox.pool.run(code, frame, target)
+        if not is_error(output):
+            answer_cache.put(message, version, {"response": output, "result": result})
+            return {
+                "response": output, "result": result, "source": "expression_cache", "code": code,
+            }, target, frame
+        expression_cache.invalidate(message, target)
+    return None, target, frame
+
 def chat(message: str):
     """
     Processes a user query using the PandasQueryEngine.
 
+    Answers come from, in order: the answer cache, the rule-based fast path
+    for templated aggregate questions, previously generated pandas code
+    re-executed locally, or a fresh LLM round trip against the aggregate
+    cube (when the question needs no row-level data) or the full dataset.
+
     Args:
         message (str): User input query.
 
     Returns:
-        str: Response from the query engine.
+        dict: ``response`` text, the ``result`` object serialized as typed
+        columns (see serialize_result; None for errors and results without a
+        tabular form), the ``source`` that produced it and the seconds spent
+        per stage (``timings``), e.g. ``fast_path``, ``context``,
+        ``generate`` for the LLM writing pandas code and ``execute`` for
+        running it.
     """
+    timings = {}
     try:
-        # Initialize the PandasQueryEngine only once
-        llm = Groq(model=model, api_key=api_key)
+        df, version = store.snapshot()
+        answer, target, frame = answer_locally(message, df, version, timings)
+        if answer is not None:
+            CHAT_ANSWERS.inc(source=answer["source"])
+            return {
+                "response": answer["response"], "result": answer["result"], "source": answer["source"],
+                "timings": timings,
+            }
+
+        # Dataset context is computed once per dataset version
+        with span("context", timings):
+            context = get_context(target)
+
+        # Combine context with the user query
+        formatted_query = f"{context}\n\nUser Query: {message}"
 
-        # Load and preprocess the dataset
-        df = pd.read_csv(r"C:\Users\dell\Desktop\chatbot\PURCHASE ORDER DATA EXTRACT 2012-2015_0.csv")
-        df = clean_and_process_data(df)
+        # The two steps of PandasQueryEngine.query, run separately so each
+        # can be timed: the LLM writes the code, the sandbox runs it
+        with span("generate", timings):
+            code = engines.generate_code(frame, formatted_query)
+        with span("execute", timings):
+            output, result = sandbox.pool.run(code, frame, target)
+
+        if not is_error(output):
+            # Only code that actually ran on the dataset is worth keeping
+            expression_cache.put(message, code, target)
+            answer_cache.put(message, version, {"response": output, "result": result})
+        source = "llm" if target == "dataset" else "llm_cube"
+        CHAT_ANSWERS.inc(source=source)
+        return {"response": output, "result": result, "source": source, "timings": timings}
+    except Exception as e:
+        # Handle and report errors
+        logger.exception("Chat failed for %r", message)
+        CHAT_ANSWERS.inc(source="error")
+        return {"response": f"An error occurred: {str(e)}", "result": None, "source": "error", "timings": timings}
 
-        # Generate context from the DataFrame
-        context = generate_context(df)
+def chat_events(message: str):
+    """
+    Staged version of chat() that yields each part of the answer as soon as
+    it is ready, instead of one response at the end.
 
-        # Initialize the query engine
-        query_engine = PandasQueryEngine(df=df, llm=llm, verbose=True)
+    Yields ``(event, data)`` pairs:
 
-        # Combine context with the user query
-        formatted_query = f"{context}\n\nUser Query: {message}"
+    - ``code``: the pandas code, right after the LLM generates it (or when
+      it comes from the expression cache).
+    - ``rows``: the ``result`` serialized as typed columns (see
+      serialize_result), right after the code has run.
+    - ``text``: pieces of a natural-language answer streamed from the LLM,
+      when STREAM_SYNTHESIS is enabled and the LLM produced the result.
+    - ``done``: the ``source`` and the final ``response`` text.
+
+    Every event carries ``elapsed``, the seconds since the question arrived.
+    """
+    started = time.perf_counter()
+    timings = {}
 
-        # Query the PandasQueryEngine
-        response = query_engine.query(formatted_query)
+    def event(name, **data):
+        return name, {**data, "elapsed": round(time.perf_counter() - started, 4)}
 
-        return response.response  # Return the raw response
+    def done(source, response):
+        CHAT_ANSWERS.inc(source=source)
+        return event("done", source=source, response=response, timings=timings)
+
+    try:
+        df, version = store.snapshot()
+        answer, target, frame = answer_locally(message, df, version, timings)
+        if answer is not None:
+            if "code" in answer:
+                yield event("code", code=answer["code"])
+            yield event("rows", result=answer["result"])
+            yield done(answer["source"], answer["response"])
+            return
+
+        # The two LLM steps PandasQueryEngine.query runs, made separately so
+        # the code can be sent before it has even run
+        with span("context", timings):
+            query = f"{get_context(target)}\n\nUser Query: {message}"
+        with span("generate", timings):
+            code = engines.generate_code(frame, query)
+        yield event("code", code=code)
+
+        with span("execute", timings):
+            output, result = sandbox.pool.run(code, frame, target)
+        yield event("rows", result=result)
+
+        source = "llm" if target == "dataset" else "llm_cube"
+        if is_error(output):
+            yield done(source, output)
+            return
+        expression_cache.put(message, code, target)
+        answer_cache.put(message, version, {"response": output, "result": result})
+
+        response = output
+        if STREAM_SYNTHESIS:
+            pieces = []
+            synthesis_started = time.perf_counter()
+            for delta in engines.synthesize(message, code, output):
+                pieces.append(delta)
+                yield event("text", delta=delta)
+            # Measured around the yields, so this includes time spent sending
+            elapsed = time.perf_counter() - synthesis_started
+            STAGE_SECONDS.observe(elapsed, stage="synthesize")
+            timings["synthesize"] = elapsed
+            response = "".join(pieces) or output
+        yield done(source, response)
     except Exception as e:
-        # Handle and report errors
-        return f"An error occurred: {str(e)}"
+        logger.exception("Streaming chat failed for %r", message)
+        yield done("error", f"An error occurred: {str(e)}")
+
+
+def warm_up():
+    """Precomputes per-dataset-version values so the first query doesn't pay for them."""
+    get_context()
+    get_time_index()
+    get_text_index()
+    get_aggregates()
+    if CUBE_ENABLED:
+        get_context("cube")
+        cube.get_vocabulary()
+
+
+# Bounded pool for the blocking LLM/pandas query path, created at startup
+chat_executor = None
+# Chat history backend, also created at startup so importing this module
+# doesn't create the history database
+history = None
 
 
-app = FastAPI(title="Procurement Chatbot API")
+async def run_chat(message: str):
+    """
+    Runs the synchronous chat() on the bounded chat executor so that slow
+    LLM calls and pandas evaluations never block the event loop.
+    """
+    loop = asyncio.get_running_loop()
+    submitted = time.perf_counter()
+
+    def run():
+        # Time spent waiting for a free slot on the executor
+        queued = time.perf_counter() - submitted
+        STAGE_SECONDS.observe(queued, stage="queue")
+        answer = chat(message)
+        answer["timings"] = {"queue": queued, **answer["timings"]}
+        return answer
+
+    # Executor threads don't inherit context variables such as the request ID
+    return await loop.run_in_executor(chat_executor, contextvars.copy_context().run, run)
+
+
+async def stream_chat(message: str):
+    """
+    Runs chat_events() on the bounded chat executor and yields its events
+    on the event loop as the worker thread produces them.
+    """
+    loop = asyncio.get_running_loop()
+    queue = asyncio.Queue()
+
+    def produce():
+        try:
+            for item in chat_events(message):
+                loop.call_soon_threadsafe(queue.put_nowait, item)
+        finally:
+            loop.call_soon_threadsafe(queue.put_nowait, None)
+
+    producer = loop.run_in_executor(chat_executor, contextvars.copy_context().run, produce)
+    while (item := await queue.get()) is not None:
+        yield item
+    await producer
+
+
+async def run_batch(questions: List[str]):
+    """
+    Answers a batch of questions, each distinct question once.
+
+    Questions are grouped by their normalized text (see normalize_query),
+    and at most BATCH_CONCURRENCY groups are answered at once through
+    run_chat, so the LLM calls overlap while the batch leaves chat slots
+    to interactive queries when BATCH_CONCURRENCY < CHAT_CONCURRENCY. All
+    of them are evaluated against the one dataset the process holds.
+
+    Yields:
+        tuple[list[int], dict]: The indexes of the questions sharing an
+        answer, and the answer (as returned by chat()), in the order the
+        answers complete.
+    """
+    groups = {}
+    for index, question in enumerate(questions):
+        groups.setdefault(normalize_query(question), []).append(index)
+    semaphore = asyncio.Semaphore(BATCH_CONCURRENCY)
+
+    async def answer(indexes):
+        async with semaphore:
+            return indexes, await run_chat(questions[indexes[0]])
+
+    tasks = [asyncio.ensure_future(answer(indexes)) for indexes in groups.values()]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            yield await next_done
+    finally:
+        # A client that went away doesn't need the questions still queued
+        for task in tasks:
+            task.cancel()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    global chat_executor, history
+    # Load and clean the dataset once for the lifetime of the worker
+    with span("load"):
+        store.load()
+    with span("warm_up"):
+        warm_up()
+    # Start the sandbox only now, so its workers start with everything
+    # loaded, and before any thread exists
+    sandbox.pool.start()
+    chat_executor = ThreadPoolExecutor(max_workers=CHAT_CONCURRENCY, thread_name_prefix="chat")
+    history = create_history()
+    yield
+    chat_executor.shutdown(wait=False, cancel_futures=True)
+    engines.close()
+    history.close()
+    sandbox.pool.close()
+
+
+app = FastAPI(title="Procurement Chatbot API", lifespan=lifespan)
 router = APIRouter()
 
-chat_history: Dict[str, List[Dict[str, str]]] = {}
+
+@app.middleware("http")
+async def track_requests(request: Request, call_next):
+    """
+    Tags the request with an ID (the client's X-Request-ID, or a new one)
+    that every log line of the request carries, and records its latency.
+    """
+    rid = request.headers.get("X-Request-ID") or uuid.uuid4().hex[:16]
+    token = request_id.set(rid)
+    started = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        response.headers["X-Request-ID"] = rid
+        return response
+    finally:
+        # Label by route template, not raw path, to keep the label set small
+        route = request.scope.get("route")
+        path = route.path if route is not None else "unmatched"
+        HTTP_SECONDS.observe(time.perf_counter() - started, method=request.method, route=path)
+        HTTP_REQUESTS.inc(method=request.method, route=path, status=status)
+        request_id.reset(token)
+
+
+def server_timing(timings):
+    """Renders stage timings (in seconds) as a Server-Timing header value."""
+    return ", ".join(f"{stage};dur={seconds * 1000:.1f}" for stage, seconds in timings.items())
 
 class ChatRequest(BaseModel):
     request: str
 
 @router.post("/chat/submit/{chat_id}")
-async def submit_chat(chat_id: str, chat_request: ChatRequest):
-    # Get the response from the chat function
-    response = chat(chat_request.request)
-
-    # Send the response to the /process-data endpoint
-    async with httpx.AsyncClient() as client:
-        process_response = await client.post(
-            "http://127.0.0.1:8000/api/v1/process-data",  # Adjust the URL if needed
-            json={"message": response}
-        )
-        process_data = process_response.json()
+async def submit_chat(chat_id: str, chat_request: ChatRequest, accept: Optional[str] = Header(None)):
+    """
+    Answers a question with its result as typed columnar JSON (see
+    serialize_result), or as an Arrow IPC stream when the client accepts
+    ``application/vnd.apache.arrow.stream``. Answers without a tabular
+    result (errors, plots) carry their text as ``message`` instead.
+    """
+    # Get the response from the chat function without blocking the event loop
+    answer = await run_chat(chat_request.request)
+    response = answer["response"]
+    result = answer["result"]
+
+    # Store the history; SQLite writes may wait on other workers, so keep
+    # them off the event loop
+    with span("history", answer["timings"]):
+        await asyncio.to_thread(history.append, chat_id, [
+            {"role": "user", "message": chat_request.request},
+            {"role": "assistant", "message": response},
+        ])
+
+    # Return the result, recording which path (cache, fast path, LLM, ...)
+    # produced it and the time spent per stage
+    headers = {"Server-Timing": server_timing(answer["timings"]), "X-Answer-Source": answer["source"]}
+    if result is not None and ARROW_MEDIA_TYPE in (accept or ""):
+        return Response(content=result_to_arrow(result), media_type=ARROW_MEDIA_TYPE, headers=headers)
+    content = {"source": answer["source"], "result": result}
+    if result is None:
+        content["message"] = response
+    return JSONResponse(content=content, headers=headers)
+
+
+@router.post("/chat/submit/{chat_id}/stream")
+async def submit_chat_stream(chat_id: str, chat_request: ChatRequest):
+    """
+    Streaming variant of /chat/submit as Server-Sent Events: ``code``,
+    ``rows``, ``text`` and ``done`` events, each sent as soon as it is ready
+    (see chat_events). The history is stored once the answer is complete.
+    """
+    async def events():
+        started = time.perf_counter()
+        first = True
+        async for name, data in stream_chat(chat_request.request):
+            if first:
+                logger.info("First %s event after %.3fs", name, time.perf_counter() - started)
+                first = False
+            if name == "done":
+                await asyncio.to_thread(history.append, chat_id, [
+                    {"role": "user", "message": chat_request.request},
+                    {"role": "assistant", "message": data["response"]},
+                ])
+            yield f"event: {name}\ndata: {json.dumps(data, default=str)}\n\n"
+
+    # Ask proxies not to buffer the stream
+    headers = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    return StreamingResponse(events(), media_type="text/event-stream", headers=headers)
+
+
+class BatchRequest(BaseModel):
+    questions: List[str]
+    stream: bool = False
+
+def batch_items(questions, indexes, answer):
+    """Result records of the questions at ``indexes``, which share ``answer``."""
+    items = []
+    for index in indexes:
+        item = {"index": index, "question": questions[index], "source": answer["source"], "result": answer["result"]}
+        if answer["result"] is None:
+            item["message"] = answer["response"]
+        if index != indexes[0]:
+            # Answered once, for the first occurrence
+            item["duplicate_of"] = indexes[0]
+        items.append(item)
+    return items
+
+@router.post("/chat/batch")
+async def submit_batch(batch_request: BatchRequest):
+    """
+    Answers a list of questions (see run_batch). Results use the format of
+    /chat/submit plus the question's ``index`` and, for repeated questions,
+    ``duplicate_of``.
+
+    By default the response is ``{"results": [...]}`` in question order,
+    sent once every question is answered. With ``"stream": true`` it is
+    newline-delimited JSON, one result per line, sent as each distinct
+    question is answered. Batches do not add to the chat history.
+    """
+    questions = batch_request.questions
+    if not questions:
+        raise HTTPException(status_code=422, detail="No questions given.")
+    if len(questions) > BATCH_MAX_QUESTIONS:
+        raise HTTPException(status_code=413, detail=f"At most {BATCH_MAX_QUESTIONS} questions per batch.")
+
+    if batch_request.stream:
+        async def lines():
+            async for indexes, answer in run_batch(questions):
+                for item in batch_items(questions, indexes, answer):
+                    yield json.dumps(item, default=str) + "\n"
+
+        headers = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+        return StreamingResponse(lines(), media_type="application/x-ndjson", headers=headers)
+
+    started = time.perf_counter()
+    results = [None] * len(questions)
+    distinct = 0
+    async for indexes, answer in run_batch(questions):
+        distinct += 1
+        for item in batch_items(questions, indexes, answer):
+            results[item["index"]] = item
+    return JSONResponse(content={
+        "results": results,
+        "questions": len(questions),
+        "distinct": distinct,
+        "seconds": round(time.perf_counter() - started, 3),
+    })
 
-    # Store the history
-    chat_history.setdefault(chat_id, []).append({"role": "user", "message": chat_request.request})
-    chat_history[chat_id].append({"role": "assistant", "message": response})
 
-    # Return the processed data
-    return JSONResponse(content=process_data)
+@router.get("/chat/history/{chat_id}")
+def get_chat_history(
+    chat_id: str,
+    since: int = Query(0, ge=0),
+    limit: Optional[int] = Query(None, ge=1, le=1000),
+    if_none_match: Optional[str] = Header(None),
+):
+    """
+    Returns the chat's messages with a sequence number above ``since``, at
+    most ``limit`` of them, oldest first.
 
+    The ETag is derived from the chat's newest sequence number and the
+    cursor, so repeating a request for an unchanged chat gets an empty 304
+    without the messages being read. The X-Next-Since header is the
+    ``since`` to pass for the next page.
+    """
+    etag = f'"{history.head(chat_id)}-{since}-{limit or 0}"'
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if if_none_match == etag:
+        headers["X-Next-Since"] = str(since)
+        return Response(status_code=304, headers=headers)
 
-@router.get("/chat/history/{chat_id}")
-def get_chat_history(chat_id: str):
-    return JSONResponse(content=chat_history.get(chat_id, []))
+    messages = history.get(chat_id, since=since, limit=limit)
+    headers["X-Next-Since"] = str(messages[-1]["seq"] if messages else since)
+    return JSONResponse(content=messages, headers=headers)
 
 
 @router.delete("/chat/history/{chat_id}")
 def delete_chat_history(chat_id: str):
-    if chat_id in chat_history:
-        del chat_history[chat_id]
+    history.delete(chat_id)
     return JSONResponse(content={"message": "Chat history deleted."})
 
 
 
-@router.post("/process-data")
-async def process_data(data: dict):
-    # Extract the message from the incoming data
-    message = data.get("message", "")
-    
+@router.post("/dataset/reload")
+def reload_dataset():
+    df = store.reload()
+    warm_up()
+    sandbox.pool.update("reload")
+    return JSONResponse(content={"message": "Dataset reloaded.", "rows": len(df), "version": store.version})
+
+
+class AppendRequest(BaseModel):
+    records: List[Dict[str, Any]]
+
+@router.post("/dataset/append")
+def append_dataset(append_request: AppendRequest):
+    # Raw rows in the CSV layout; derived aggregates are updated incrementally
+    raw = pd.DataFrame(append_request.records)
+    problems = validate_raw_rows(raw)
+    if problems:
+        raise HTTPException(status_code=422, detail=problems)
+    rows = store.append(raw)
+    warm_up()
+    sandbox.pool.update("append", raw)
+    return JSONResponse(content={"message": "Rows appended.", "rows": len(rows), "version": store.version})
+
+
+@router.get("/suppliers")
+def get_suppliers(limit: int = 100):
+    # Supplier dimension: canonical name, order count and spend per Supplier ID
+    dimension = store.derived("supplier_dimension", build_supplier_dimension)
+    top = dimension.nlargest(limit, "Total Price")
+    return JSONResponse(content=top.to_dict(orient="records"))
+
+
+@router.get("/metrics")
+def get_metrics():
+    # Prometheus text exposition format
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
+
+
+@router.get("/stats")
+def get_stats():
+    return JSONResponse(content={
+        "engine": engines.stats,
+        "answer_cache": answer_cache.stats,
+        "expression_cache": expression_cache.stats,
+        "sandbox": sandbox.pool.stats,
+        "memory": {"total_bytes": sum(store.memory.values()), "columns": store.memory},
+    })
+
+
+def format_response(message: str):
+    """
+    Formats a raw query engine response into label/value records, for
+    clients of the /process-data route. The chat endpoints send the result
+    object itself instead (see serialize_result).
+
+    Args:
+        message (str): Raw response text from the query engine.
+
+    Returns:
+        dict: ``{"data": [...]}`` records, or ``{"error": ...}``.
+    """
     # Ensure message is non-empty
     if not message:
         return {"error": "No message provided in the data"}
@@ -222,4 +677,11 @@ async def process_data(data: dict):
 
     # Ensure proper response format
     return {"data": response_data}
+
+
+@router.post("/process-data")
+def process_data(data: dict):
+    # Extract the message from the incoming data
+    with span("process_data"):
+        return format_response(data.get("message", ""))
 app.include_router(router, prefix="/api/v1")
@@ -0,0 +1,265 @@
+import ast
+import logging
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+from llama_index.core.output_parsers.utils import parse_code_markdown
+from llama_index.experimental.exec_utils import _get_restricted_globals, _verify_source_safety
+
+
+logger = logging.getLogger(__name__)
+
+# Prefix of the message returned when generated code fails, matching the
+# wording of llama-index's default pandas output processor
+ERROR_PREFIX = "There was an error running the output as Python code."
+
+# Media type of results sent as an Arrow IPC stream
+ARROW_MEDIA_TYPE = "application/vnd.apache.arrow.stream"
+
+# pandas.api.types.infer_dtype kinds -> column type of a serialized result;
+# anything else is sent as a string
+INFERRED_TYPES = {
+    "boolean": "boolean",
+    "integer": "integer",
+    "floating": "number",
+    "mixed-integer-float": "number",
+    "decimal": "number",
+    "datetime64": "datetime",
+    "datetime": "datetime",
+}
+
+# Column types sent as numbers -> (numpy dtype, placeholder for missing values)
+NATIVE_TYPES = {"boolean": ("bool", False), "integer": ("int64", 0), "number": ("float64", 0.0)}
+
+# Column type of a serialized result -> Arrow type
+ARROW_TYPES = {
+    "boolean": pa.bool_(),
+    "integer": pa.int64(),
+    "number": pa.float64(),
+    "datetime": pa.timestamp("s"),
+    "string": pa.string(),
+}
+
+
+def extract_code(llm_output: str) -> str:
+    """
+    Extracts the pandas code from an LLM response, which may wrap it in a
+    markdown code block.
+    """
+    code = parse_code_markdown(llm_output, only_last=True)
+    if not isinstance(code, str):
+        code = code[0]
+    return code.strip()
+
+
+def _restricted(run, source, global_vars, local_vars):
+    # llama-index's safe_exec/safe_eval, minus the SIGALRM timeout that newer
+    # versions add: signals only work on the main thread, and this runs on
+    # chat executor threads. The sandbox enforces its own timeout.
+    _verify_source_safety(source)
+    return run(source, _get_restricted_globals(global_vars), local_vars)
+
+
+def execute_pandas_code(code: str, df: pd.DataFrame, helpers=None):
+    """
+    Executes generated pandas code against ``df`` and returns the value of its
+    last expression.
+
+    All statements but the last are executed, then the last one is evaluated.
+    Both go through the restrictions of llama-index's ``safe_exec`` and
+    ``safe_eval``, the same sandboxing PandasQueryEngine applies, without
+    their signal-based timeout.
+
+    Args:
+        code (str): Pandas code, e.g. ``df.groupby("Department Name")["Total Price"].sum()``.
+        df (pd.DataFrame): The DataFrame the code refers to as ``df``.
+        helpers (dict): Extra names made available to the code, e.g.
+            ``search_items``.
+
+    Returns:
+        The result object (DataFrame, Series, scalar, ...).
+
+    Raises:
+        Exception: Whatever the code raises.
+    """
+    local_vars = {"df": df, **(helpers or {})}
+    global_vars = {"np": np, "pd": pd}
+
+    tree = ast.parse(code)
+    module = ast.Module(tree.body[:-1], type_ignores=[])
+    _restricted(exec, ast.unparse(module), {}, local_vars)
+
+    last_expression = ast.unparse(ast.Module(tree.body[-1:], type_ignores=[]))
+    if last_expression.strip("'\"") != last_expression:
+        # A quoted expression has to be evaluated to get the actual code
+        last_expression = _restricted(eval, last_expression, global_vars, local_vars)
+    return _restricted(eval, last_expression, global_vars, local_vars)
+
+
+def render_result(result, max_rows=None, max_chars=None) -> str:
+    """
+    Renders a result as text, within size limits.
+
+    Args:
+        result: Value returned by execute_pandas_code.
+        max_rows (int): DataFrames and Series longer than this are cut to
+            their first ``max_rows`` rows before rendering.
+        max_chars (int): The text is cut to this many characters.
+
+    Returns:
+        str: The rendered result, with a note when it was cut.
+    """
+    note = ""
+    if max_rows and isinstance(result, (pd.DataFrame, pd.Series)) and len(result) > max_rows:
+        note = f"\n... {len(result) - max_rows:,} more rows not shown"
+        result = result.head(max_rows)
+    text = str(result)
+    if max_chars and len(text) > max_chars:
+        note = f"\n... {len(text) - max_chars:,} more characters not shown"
+        text = text[:max_chars]
+    return text + note
+
+
+def _column_type(values: pd.Series) -> str:
+    dtype = values.dtype
+    if isinstance(dtype, pd.CategoricalDtype):
+        return INFERRED_TYPES.get(pd.api.types.infer_dtype(dtype.categories, skipna=True), "string")
+    if dtype == object:
+        return INFERRED_TYPES.get(pd.api.types.infer_dtype(values, skipna=True), "string")
+    if pd.api.types.is_bool_dtype(dtype):
+        return "boolean"
+    if pd.api.types.is_integer_dtype(dtype):
+        return "integer"
+    if pd.api.types.is_float_dtype(dtype):
+        return "number"
+    if pd.api.types.is_datetime64_any_dtype(dtype):
+        return "datetime"
+    return "string"
+
+
+def _serialize_column(name, values: pd.Series) -> dict:
+    """Converts a column to ``{"name", "type", "values"}`` with nulls as None."""
+    kind = _column_type(values)
+    missing = values.isna().to_numpy()
+    if kind in NATIVE_TYPES:
+        # tolist() on a native array yields plain Python numbers
+        dtype, fill = NATIVE_TYPES[kind]
+        if isinstance(values.dtype, pd.CategoricalDtype):
+            values = values.astype(object)
+        array = values.to_numpy(dtype=dtype, na_value=fill)
+        if kind == "number":
+            # JSON has no NaN or infinity
+            missing = missing | ~np.isfinite(array)
+        column = array.tolist()
+    else:
+        if kind == "datetime":
+            values = pd.to_datetime(values).dt.strftime("%Y-%m-%dT%H:%M:%S")
+        column = values.astype(str).tolist()
+    for i in np.flatnonzero(missing):
+        column[i] = None
+    if isinstance(name, tuple):
+        name = " / ".join(str(part) for part in name)
+    return {"name": str(name), "type": kind, "values": column}
+
+
+def serialize_result(result, max_rows=None):
+    """
+    Serializes a result object as typed columnar JSON, without rendering it
+    as text first.
+
+    DataFrames and Series become a table; a meaningful index (named, or
+    not plain row numbers) becomes the leading column(s)::
+
+        {"kind": "table", "row_count": 52, "truncated": False,
+         "columns": [{"name": "Department Name", "type": "string", "values": [...]},
+                     {"name": "Total Price", "type": "number", "values": [...]}]}
+
+    Scalars become ``{"kind": "scalar", "type": "number", "value": 1234.5}``.
+    Column types are ``string``, ``integer``, ``number``, ``boolean`` and
+    ``datetime`` (ISO 8601 text); missing values are None.
+
+    Args:
+        result: Value returned by execute_pandas_code (or a fast path
+            handler).
+        max_rows (int): Tables longer than this are cut to their first
+            ``max_rows`` rows; ``row_count`` keeps the full length.
+
+    Returns:
+        dict | None: The serialized result, or None when it has no tabular
+        form (e.g. a plot), in which case only the text rendering is sent.
+    """
+    try:
+        if pd.api.types.is_scalar(result):
+            column = _serialize_column("value", pd.Series([result]))
+            return {"kind": "scalar", "type": column["type"], "value": column["values"][0]}
+        if isinstance(result, (list, tuple, dict, np.ndarray, pd.Index)):
+            result = pd.Series(result)
+        if isinstance(result, pd.Series):
+            result = result.to_frame("value" if result.name is None else result.name)
+        if not isinstance(result, pd.DataFrame):
+            return None
+
+        row_count = len(result)
+        if max_rows and row_count > max_rows:
+            result = result.head(max_rows)
+        index = result.index
+        if any(name is not None for name in index.names) or not pd.api.types.is_integer_dtype(index.dtype):
+            result = result.reset_index(allow_duplicates=True)
+        columns = [_serialize_column(name, result.iloc[:, i]) for i, name in enumerate(result.columns)]
+        return {"kind": "table", "row_count": row_count, "truncated": len(result) < row_count, "columns": columns}
+    except MemoryError:
+        raise
+    except Exception as e:
+        logger.warning("Cannot serialize %s result: %s", type(result).__name__, e)
+        return None
+
+
+def result_to_arrow(result: dict) -> bytes:
+    """
+    Encodes a serialize_result table (or scalar, as a one-row ``value``
+    column) as an Arrow IPC stream. ``row_count`` and ``truncated`` are
+    kept in the schema metadata.
+    """
+    if result["kind"] == "scalar":
+        columns = [{"name": "value", "type": result["type"], "values": [result["value"]]}]
+        metadata = {"row_count": "1", "truncated": "false"}
+    else:
+        columns = result["columns"]
+        metadata = {"row_count": str(result["row_count"]), "truncated": str(result["truncated"]).lower()}
+    arrays = []
+    for column in columns:
+        if column["type"] == "datetime":
+            arrays.append(pa.array(column["values"], pa.string()).cast(ARROW_TYPES["datetime"]))
+        else:
+            arrays.append(pa.array(column["values"], ARROW_TYPES[column["type"]]))
+    table = pa.Table.from_arrays(arrays, names=[column["name"] for column in columns], metadata=metadata)
+
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+def run_pandas_code(code: str, df: pd.DataFrame, helpers=None, max_rows=None, max_chars=None):
+    """
+    Executes generated pandas code and returns its result rendered as text,
+    within the size limits of render_result, and serialized by
+    serialize_result.
+
+    Errors are reported in the returned text rather than raised, as
+    PandasQueryEngine does; the serialized result is then None.
+
+    Returns:
+        tuple[str, dict | None]: The text and the serialized result.
+    """
+    try:
+        result = execute_pandas_code(code, df, helpers)
+        return render_result(result, max_rows, max_chars), serialize_result(result, max_rows)
+    except Exception as e:
+        logger.warning("Generated pandas code failed: %s", e)
+        return f"{ERROR_PREFIX} Error message: {e}", None
+
+
+def is_error(output: str) -> bool:
+    """Whether ``output`` is the error message of a failed execution."""
+    return output.startswith(ERROR_PREFIX)
@@ -0,0 +1,333 @@
+import os
+import queue
+import signal
+import logging
+import threading
+import multiprocessing
+
+try:
+    import resource
+except ImportError:  # Windows; the sandbox is disabled there anyway
+    resource = None
+
+import config
+import cube
+from dataset import store
+from pandas_exec import ERROR_PREFIX, execute_pandas_code, render_result, run_pandas_code, serialize_result
+from text_index import query_locals
+
+
+logger = logging.getLogger(__name__)
+
+# Workers are forked so that they start with the loaded dataset, cube and
+# text index already in memory (see _fork_server); fork is unavailable on
+# Windows
+try:
+    _context = multiprocessing.get_context("fork")
+except ValueError:
+    _context = None
+
+
+def enabled():
+    """Whether generated code runs in sandbox workers rather than in-process."""
+    return config.SANDBOX_ENABLED and _context is not None
+
+
+def query_helpers(target):
+    """Helpers available to generated code run on ``target``."""
+    return query_locals() if target == "dataset" else None
+
+
+def _limit_memory(memory_mb):
+    # RLIMIT_AS caps address space, which already includes everything
+    # inherited from the parent (and the mapped snapshot), so the cap is
+    # added on top of the current size
+    try:
+        with open("/proc/self/statm") as f:
+            current = int(f.read().split()[0]) * os.sysconf("SC_PAGE_SIZE")
+    except OSError:
+        logger.warning("Cannot read process size; sandbox memory cap disabled")
+        return
+    limit = current + memory_mb * 2**20
+    resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+
+
+def _serve(conn, memory_mb):
+    """Main loop of a sandbox worker process."""
+    # The parent handles Ctrl+C and shutdown, and kills its workers
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    if memory_mb and resource is not None:
+        _limit_memory(memory_mb)
+
+    while True:
+        try:
+            code, target = conn.recv()
+        except (EOFError, OSError):
+            return
+        frame = cube.get_cube() if target == "cube" else store.df
+        structured = None
+        try:
+            result = execute_pandas_code(code, frame, query_helpers(target))
+            output = render_result(result, config.SANDBOX_MAX_ROWS, config.SANDBOX_MAX_CHARS)
+            # Serialized here, so only plain lists of at most SANDBOX_MAX_ROWS
+            # values cross the pipe rather than the pandas object
+            structured = serialize_result(result, config.SANDBOX_MAX_ROWS)
+        except MemoryError:
+            output = f"{ERROR_PREFIX} Error message: the code exceeded the {memory_mb} MB memory limit"
+        except Exception as e:
+            output = f"{ERROR_PREFIX} Error message: {e}"
+        # Free the result before sending, so the next query starts small
+        result = None
+        conn.send((output, structured))
+
+
+def _prepare():
+    """Builds the derived values generated code uses, before workers are forked."""
+    if config.CUBE_ENABLED:
+        cube.get_cube()
+    query_locals()
+
+
+def _reap(pid):
+    try:
+        os.kill(pid, signal.SIGKILL)
+    except ProcessLookupError:
+        pass
+    try:
+        os.waitpid(pid, 0)
+    except ChildProcessError:
+        pass
+
+
+def _fork_server(conn, api_conn, memory_mb):
+    """
+    Main loop of the process that forks the sandbox workers.
+
+    It is forked from the API process once, before that process starts any
+    threads, and never starts one itself, so forking a worker can't copy a
+    lock that another thread holds. The API process replays its dataset
+    changes here so that new workers see them. Commands, as ``(command,
+    argument)`` pairs:
+
+    - ``("fork", conn)``: forks a worker serving ``conn``; replies its pid.
+    - ``("kill", pid)``: kills and reaps a worker.
+    - ``("reload", None)``, ``("append", raw)``: applies the dataset change;
+      replies the new dataset version, or the exception it raised.
+
+    ``api_conn`` is this process's copy of the API process's end of the
+    pipe; it is closed so that the server sees EOF when the API process
+    closes its end.
+    """
+    api_conn.close()
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    children = set()
+    while True:
+        try:
+            command, argument = conn.recv()
+        except (EOFError, OSError):
+            break
+        if command == "fork":
+            pid = os.fork()
+            if pid == 0:
+                conn.close()
+                try:
+                    _serve(argument, memory_mb)
+                finally:
+                    os._exit(0)
+            argument.close()
+            children.add(pid)
+            conn.send(pid)
+        elif command == "kill":
+            children.discard(argument)
+            _reap(argument)
+        else:
+            try:
+                if command == "reload":
+                    store.reload()
+                else:
+                    store.append(argument)
+                _prepare()
+                conn.send(store.version)
+            except Exception as e:
+                logger.exception("Sandbox fork server could not apply %s", command)
+                conn.send(e)
+    # The API process is gone or closed the pool
+    for pid in children:
+        _reap(pid)
+
+
+class _Worker:
+    def __init__(self, generation, pid, conn):
+        self.generation = generation
+        self.pid = pid
+        self.conn = conn
+
+
+class SandboxPool:
+    """
+    Pre-forked worker processes that run LLM-generated pandas code.
+
+    Each query runs in a worker that was forked after the dataset was loaded
+    and warmed up, so it needs no reload. A query that runs longer than
+    ``timeout`` seconds is killed together with its worker, a query that
+    allocates more than ``memory_mb`` gets a MemoryError (or kills its
+    worker), and results are cut to SANDBOX_MAX_ROWS rows and
+    SANDBOX_MAX_CHARS characters. Dead workers are replaced by new forks.
+
+    Workers are forked by a single-threaded fork server (see _fork_server)
+    rather than by the request threads of this process. When the dataset
+    changes, update() applies the change there too and the whole pool is
+    re-forked so the workers see the new data.
+    """
+
+    def __init__(self, size, timeout, memory_mb):
+        self.size = size
+        self.timeout = timeout
+        self.memory_mb = memory_mb
+        self._lock = threading.Lock()
+        self._idle = queue.Queue()
+        self._workers = set()
+        # Connection to the fork server, and its process
+        self._server = None
+        self._server_process = None
+        # Bumped on every re-fork; workers of older generations are retired
+        self._generation = 0
+        self.version = None
+        self.stats = {"runs": 0, "timeouts": 0, "crashes": 0, "forks": 0}
+
+    def _spawn(self):
+        conn, child_conn = _context.Pipe()
+        self._server.send(("fork", child_conn))
+        child_conn.close()
+        worker = _Worker(self._generation, self._server.recv(), conn)
+        self._workers.add(worker)
+        self.stats["forks"] += 1
+        return worker
+
+    def start(self):
+        """
+        Starts the fork server and forks all workers from the current state
+        of this process. Call once the dataset is loaded and warmed up, and
+        before the process starts any threads. Does nothing when the sandbox
+        is disabled or fork is unavailable.
+        """
+        if not enabled():
+            return
+        with self._lock:
+            self._server, server_conn = _context.Pipe()
+            self._server_process = _context.Process(
+                target=_fork_server, args=(server_conn, self._server, self.memory_mb), daemon=True
+            )
+            self._server_process.start()
+            server_conn.close()
+            self._refork(store.version)
+
+    def update(self, change, raw=None):
+        """
+        Applies a dataset change to the fork server and re-forks all workers.
+        Call after making the same change to this process's store.
+
+        Args:
+            change (str): "reload", or "append" with the appended ``raw`` rows.
+            raw (pd.DataFrame): Rows passed to DatasetStore.append.
+
+        Raises:
+            RuntimeError: If the fork server failed to apply the change.
+        """
+        if self._server is None:
+            return
+        with self._lock:
+            self._server.send((change, raw))
+            version = self._server.recv()
+            if isinstance(version, Exception):
+                raise RuntimeError(f"Sandbox could not apply the dataset {change}") from version
+            self._refork(version)
+
+    def _refork(self, version):
+        self._generation += 1
+        self.version = version
+        # Idle workers of the old generation are retired now, busy ones when
+        # they finish
+        while not self._idle.empty():
+            self._retire(self._idle.get_nowait())
+        for _ in range(self.size):
+            self._idle.put(self._spawn())
+        logger.info("Forked %d sandbox workers for dataset version %d", self.size, self.version)
+
+    def _retire(self, worker):
+        self._workers.discard(worker)
+        worker.conn.close()
+        self._server.send(("kill", worker.pid))
+
+    def _release(self, worker, replace=False):
+        with self._lock:
+            if replace or worker.generation != self._generation:
+                self._retire(worker)
+                if worker.generation != self._generation:
+                    return
+                worker = self._spawn()
+            self._idle.put(worker)
+
+    def run(self, code, df, target="dataset"):
+        """
+        Runs generated pandas code in a sandbox worker and returns its result
+        rendered as text and serialized (see serialize_result).
+
+        Args:
+            code (str): Pandas code.
+            df (pd.DataFrame): The frame the code refers to; only used when
+                the sandbox is disabled and the code runs in-process.
+            target (str): "dataset" or "cube".
+
+        Returns:
+            tuple[str, dict | None]: The rendered result, or an error
+            message (see is_error), and the serialized result, or None on
+            errors.
+
+        Raises:
+            RuntimeError: If the sandbox is enabled but start() wasn't called.
+        """
+        if not enabled():
+            return run_pandas_code(
+                code, df, query_helpers(target), config.SANDBOX_MAX_ROWS, config.SANDBOX_MAX_CHARS
+            )
+        if self._server is None:
+            raise RuntimeError("The sandbox pool has not been started.")
+
+        worker = self._idle.get()
+        self.stats["runs"] += 1
+        try:
+            worker.conn.send((code, target))
+            if not worker.conn.poll(self.timeout):
+                self.stats["timeouts"] += 1
+                self._release(worker, replace=True)
+                logger.warning("Killed sandbox worker after %ss running: %s", self.timeout, code)
+                return f"{ERROR_PREFIX} Error message: the code did not finish within {self.timeout} seconds", None
+            output = worker.conn.recv()
+        except (EOFError, OSError):
+            # Typically the kernel killed the worker for exceeding its memory
+            self.stats["crashes"] += 1
+            self._release(worker, replace=True)
+            logger.warning("Sandbox worker died running: %s", code)
+            return f"{ERROR_PREFIX} Error message: the code crashed its worker, e.g. by using too much memory", None
+        self._release(worker)
+        return output
+
+    def close(self):
+        """Kills all workers and the fork server."""
+        with self._lock:
+            if self._server is None:
+                return
+            for worker in list(self._workers):
+                worker.conn.close()
+            self._workers = set()
+            self._idle = queue.Queue()
+            # On EOF the fork server kills its workers and exits
+            self._server.close()
+            self._server = None
+            self._server_process.join()
+
+
+pool = SandboxPool(config.SANDBOX_WORKERS, config.SANDBOX_TIMEOUT, config.SANDBOX_MEMORY_MB)
@@ -0,0 +1,71 @@
+import re
+import json
+import time
+import random
+from typing import Any, Dict
+
+from llama_index.core.llms import CompletionResponse, CompletionResponseGen, CustomLLM, LLMMetadata
+from llama_index.core.llms.callbacks import llm_completion_callback
+
+
+# (keyword in the question, canned pandas code); first match wins. The code
+# only uses columns present in both the dataset and the aggregate cube,
+# except for item questions, which never go to the cube.
+CANNED_CODE = [
+    ("item", 'df["Item Name"].value_counts().head(10)'),
+    ("supplier", 'df.groupby("Supplier Name", observed=True)["Total Price"].sum().nlargest(5)'),
+    ("calcard", 'df[df["CalCard"].astype(str).str.upper() == "YES"]["Total Price"].sum()'),
+    ("acquisition", 'df.groupby("Acquisition Type", observed=True)["Total Price"].sum()'),
+    ("year", 'df.groupby("Fiscal Year", observed=True)["Total Price"].sum()'),
+]
+DEFAULT_CODE = 'df.groupby("Department Name", observed=True)["Total Price"].sum().nlargest(5)'
+
+SYNTHESIS_TEXT = "Here is the answer to your question, based on the table above."
+
+
+class StubLLM(CustomLLM):
+    """
+    Offline stand-in for the Groq LLM, for benchmarks and load tests.
+
+    Answers the pandas prompt with canned code chosen by keyword (or looked
+    up in ``responses``, keyed by the exact user question) after sleeping
+    ``latency`` seconds, plus up to ``jitter`` seconds, to mimic a remote
+    model. Any other prompt (e.g. response synthesis) gets a fixed sentence.
+    """
+
+    latency: float = 0.5
+    jitter: float = 0.0
+    responses: Dict[str, str] = {}
+
+    @classmethod
+    def from_file(cls, path, **kwargs):
+        """Builds a stub whose ``responses`` are read from a JSON object file."""
+        with open(path, encoding="utf-8") as f:
+            return cls(responses=json.load(f), **kwargs)
+
+    @property
+    def metadata(self) -> LLMMetadata:
+        return LLMMetadata(model_name="stub")
+
+    def _respond(self, prompt):
+        time.sleep(self.latency + random.uniform(0, self.jitter))
+        match = re.search(r"User Query: (.*)", prompt)
+        if match is None:
+            return SYNTHESIS_TEXT
+        question = match[1].strip()
+        code = self.responses.get(question)
+        if code is None:
+            lowered = question.lower()
+            code = next((code for keyword, code in CANNED_CODE if keyword in lowered), DEFAULT_CODE)
+        return f"```python\n{code}\n```"
+
+    @llm_completion_callback()
+    def complete(self, prompt: str, formatted: bool = False, **kwargs: Any) -> CompletionResponse:
+        return CompletionResponse(text=self._respond(prompt))
+
+    @llm_completion_callback()
+    def stream_complete(self, prompt: str, formatted: bool = False, **kwargs: Any) -> CompletionResponseGen:
+        text = ""
+        for word in re.findall(r"\S+\s*", self._respond(prompt)):
+            text += word
+            yield CompletionResponse(text=text, delta=word)
@@ -0,0 +1,284 @@
+import re
+import difflib
+import logging
+from collections import defaultdict
+import numpy as np
+import pandas as pd
+
+try:
+    from rapidfuzz.fuzz import ratio as _rapidfuzz_ratio
+except ImportError:  # rapidfuzz is optional; fall back to the slower difflib
+    _rapidfuzz_ratio = None
+
+
+logger = logging.getLogger(__name__)
+
+# Legal-form words that don't distinguish one vendor from another
+LEGAL_SUFFIXES = {
+    "inc", "incorporated", "llc", "corp", "corporation", "co", "company",
+    "ltd", "limited", "lp", "llp", "pc", "pllc", "plc", "dba",
+}
+
+# Minimum similarity (0-100) for two normalized names to be the same vendor
+SIMILARITY_THRESHOLD = 92
+# Neighbours compared on each side within a block, after sorting
+WINDOW = 8
+
+
+def normalize_supplier_name(name):
+    """
+    Reduces a supplier name to a comparison key, e.g.
+    "Dell Marketing, L.P." and "DELL MARKETING LP" both become "dell marketing".
+    """
+    name = name.lower().replace("&", " and ")
+    name = re.sub(r"\b([a-z])\.(?=[a-z]\.)", r"\1", name)  # "l.p." -> "lp."
+    tokens = re.findall(r"[a-z0-9]+", name)
+    while tokens and tokens[-1] in LEGAL_SUFFIXES:
+        tokens.pop()
+    if tokens and tokens[0] == "the":
+        tokens.pop(0)
+    return " ".join(tokens)
+
+
+def similarity(a, b):
+    """Similarity of two strings on a 0-100 scale."""
+    if _rapidfuzz_ratio is not None:
+        return _rapidfuzz_ratio(a, b)
+    matcher = difflib.SequenceMatcher(None, a, b)
+    if matcher.real_quick_ratio() * 100 < SIMILARITY_THRESHOLD:
+        return 0.0
+    return matcher.ratio() * 100
+
+
+class _UnionFind:
+    def __init__(self, size):
+        self.parent = np.arange(size)
+
+    def find(self, i):
+        root = i
+        while self.parent[root] != root:
+            root = self.parent[root]
+        while self.parent[i] != root:
+            self.parent[i], i = root, self.parent[i]
+        return root
+
+    def union(self, i, j):
+        """Merges the sets of ``i`` and ``j`` and returns the new root."""
+        root_i, root_j = self.find(i), self.find(j)
+        root = min(root_i, root_j)
+        self.parent[max(root_i, root_j)] = root
+        return root
+
+
+def _digits(key):
+    return re.findall(r"\d+", key)
+
+
+def cluster_supplier_names(names, codes, counts):
+    """
+    Groups spellings of the same vendor.
+
+    Names are merged when they share a non-zero Supplier Code, normalize to
+    the same key, or are fuzzy matches, but never when their clusters have
+    non-zero codes and none in common. Fuzzy matching compares whole
+    clusters through their representative (most frequent) name: a cluster
+    is attached to the representative of another cluster, never chained
+    through a name that was itself attached, and only when both contain the
+    same numbers, so "Vendor 27" and "Vendor 277" stay apart. It is blocked
+    on the first token of the normalized name and, inside a block, only
+    looks at the WINDOW preceding clusters in sorted order, so the number of
+    comparisons grows linearly rather than quadratically.
+
+    Args:
+        names (list[str]): Distinct raw supplier names.
+        codes (list[list[float]]): Supplier Codes seen with each name.
+        counts (np.ndarray): Number of rows per name.
+
+    Returns:
+        tuple[np.ndarray, list[str]]: Cluster id per name, and each
+        cluster's canonical (most frequent) spelling.
+    """
+    uf = _UnionFind(len(names))
+    keys = [normalize_supplier_name(name) for name in names]
+    # Root -> non-zero Supplier Codes of its cluster
+    cluster_codes = [
+        frozenset(code for code in name_codes if pd.notna(code) and code != 0) for name_codes in codes
+    ]
+
+    def merge(i, j):
+        root_i, root_j = uf.find(i), uf.find(j)
+        if root_i == root_j:
+            return True
+        codes_i, codes_j = cluster_codes[root_i], cluster_codes[root_j]
+        if codes_i and codes_j and not codes_i & codes_j:
+            return False
+        cluster_codes[uf.union(root_i, root_j)] = codes_i | codes_j
+        return True
+
+    # A shared code is the strongest evidence, so those merges come first
+    first_by_code = {}
+    for i, name_codes in enumerate(cluster_codes):
+        for code in name_codes:
+            merge(i, first_by_code.setdefault(code, i))
+    first_by_key = {}
+    for i, key in enumerate(keys):
+        if key:
+            merge(i, first_by_key.setdefault(key, i))
+
+    # Representative of each cluster: its most frequent name
+    representative = {}
+    for i, key in enumerate(keys):
+        root = uf.find(i)
+        if key and (root not in representative or counts[i] > counts[representative[root]]):
+            representative[root] = i
+
+    blocks = defaultdict(list)
+    for root, i in representative.items():
+        blocks[keys[i].split(" ", 1)[0]].append(root)
+    for block in blocks.values():
+        block.sort(key=lambda root: keys[representative[root]])
+        for position, root in enumerate(block):
+            key = keys[representative[root]]
+            scores = {}
+            for other in block[max(0, position - WINDOW):position]:
+                # Neighbours already attached elsewhere are compared through
+                # the representative they were attached to
+                other_root = uf.find(other)
+                other_key = keys[representative[other_root]]
+                if other_root != uf.find(root) and other_root not in scores and _digits(key) == _digits(other_key):
+                    scores[other_root] = similarity(key, other_key)
+            for other_root, score in sorted(scores.items(), key=lambda item: -item[1]):
+                if score < SIMILARITY_THRESHOLD:
+                    break
+                target = representative[other_root]
+                if merge(root, other_root):
+                    representative[uf.find(root)] = target
+                    break
+
+    roots = np.array([uf.find(i) for i in range(len(names))])
+    # Canonical spelling: the most frequent raw name of each cluster
+    order = np.lexsort((-counts, roots))
+    canonical = {}
+    for i in order:
+        canonical.setdefault(roots[i], names[i])
+    root_ids, cluster_ids = np.unique(roots, return_inverse=True)
+    return cluster_ids, [canonical[root] for root in root_ids]
+
+
+def _codes_per_name(df, row_names, size):
+    """Supplier Codes seen with each of ``size`` names, given each row's name."""
+    if "Supplier Code" not in df.columns:
+        return [[] for _ in range(size)]
+    pairs = pd.DataFrame({"name": row_names, "code": df["Supplier Code"].to_numpy()}).drop_duplicates()
+    grouped = pairs.groupby("name")["code"].agg(list)
+    return [grouped.get(i, []) for i in range(size)]
+
+
+def canonicalize_suppliers(df):
+    """
+    Replaces "Supplier Name" with canonical vendor names and adds an integer
+    "Supplier ID".
+
+    The work is done once per distinct spelling, not per row. IDs are
+    assigned in alphabetical order of canonical name, so "Supplier Name" is a
+    categorical whose codes are exactly the Supplier IDs and supplier
+    group-bys run on integer codes.
+
+    Args:
+        df (pd.DataFrame): Data with raw "Supplier Name" and "Supplier Code".
+
+    Returns:
+        pd.DataFrame: The data with canonical supplier columns.
+    """
+    if "Supplier Name" not in df.columns:
+        return df
+    row_names, names = pd.factorize(df["Supplier Name"].astype(str))
+    counts = np.bincount(row_names, minlength=len(names))
+    codes = _codes_per_name(df, row_names, len(names))
+
+    cluster_ids, canonical = cluster_supplier_names(list(names), codes, counts)
+
+    # Renumber clusters alphabetically so categorical codes == Supplier ID
+    by_name = np.argsort(np.array(canonical, dtype=object), kind="stable")
+    supplier_ids = np.empty(len(canonical), dtype=np.int32)
+    supplier_ids[by_name] = np.arange(len(canonical), dtype=np.int32)
+    row_ids = supplier_ids[cluster_ids][row_names]
+
+    df["Supplier ID"] = row_ids
+    df["Supplier Name"] = pd.Categorical.from_codes(
+        row_ids, categories=pd.Index(np.array(canonical, dtype=object)[by_name])
+    )
+    logger.info("Canonicalized %d supplier spellings into %d suppliers", len(names), len(canonical))
+    return df
+
+
+def extend_suppliers(df, new_rows):
+    """
+    Canonicalizes appended rows against the suppliers already in ``df``,
+    keeping every existing Supplier ID and canonical name.
+
+    Existing suppliers (with their codes) and the new spellings are
+    clustered together (see cluster_supplier_names). A new spelling that
+    joins an existing supplier gets its ID and name; other vendors get the
+    next free IDs, so "Supplier Name" codes still equal the Supplier IDs.
+
+    Args:
+        df (pd.DataFrame): Canonicalized data.
+        new_rows (pd.DataFrame): Cleaned rows with raw "Supplier Name".
+
+    Returns:
+        pd.DataFrame | None: ``new_rows`` with canonical supplier columns,
+        whose "Supplier Name" categories extend those of ``df``; or None
+        when the new rows would merge or rename existing suppliers, in which
+        case the whole dataset has to be canonicalized again.
+    """
+    categories = df["Supplier Name"].cat.categories
+    known = len(categories)
+    row_names, names = pd.factorize(new_rows["Supplier Name"].astype(str))
+
+    existing_ids = df["Supplier ID"].to_numpy()
+    counts = np.concatenate([
+        np.bincount(existing_ids, minlength=known), np.bincount(row_names, minlength=len(names)),
+    ])
+    codes = _codes_per_name(df, existing_ids, known) + _codes_per_name(new_rows, row_names, len(names))
+    cluster_ids, canonical = cluster_supplier_names(list(categories) + list(names), codes, counts)
+
+    existing_clusters = cluster_ids[:known]
+    if len(np.unique(existing_clusters)) < known:
+        return None
+    supplier_ids = np.full(len(canonical), -1, dtype=np.int64)
+    supplier_ids[existing_clusters] = np.arange(known)
+    new_clusters = cluster_ids[known:]
+    unmatched = np.unique(new_clusters[supplier_ids[new_clusters] < 0])
+    supplier_ids[unmatched] = known + np.arange(len(unmatched))
+    added = pd.Index(np.array([canonical[cluster] for cluster in unmatched], dtype=object))
+    if added.isin(categories).any():
+        # A new vendor spelled exactly like an existing one with another code
+        return None
+
+    row_ids = supplier_ids[new_clusters][row_names].astype(np.int32)
+    new_rows["Supplier ID"] = row_ids
+    new_rows["Supplier Name"] = pd.Categorical.from_codes(row_ids, categories=categories.append(added))
+    logger.info(
+        "Matched %d new supplier spellings to existing suppliers and %d new ones",
+        len(names), len(added),
+    )
+    return new_rows
+
+
+def build_supplier_dimension(df):
+    """
+    Builds the supplier dimension table from canonicalized data.
+
+    Returns:
+        pd.DataFrame: One row per Supplier ID with its canonical name, order
+        count and total spend.
+    """
+    dimension = df.groupby("Supplier ID").agg(
+        **{
+            "Supplier Name": ("Supplier Name", "first"),
+            "Order Count": ("Supplier Name", "size"),
+            "Total Price": ("Total Price", "sum"),
+        }
+    )
+    return dimension.reset_index()
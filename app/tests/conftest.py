@@ -0,0 +1,33 @@
+import os
+import sys
+import tempfile
+
+import pytest
+
+# The app imports its modules by name, from the app directory
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, APP_DIR)
+
+# config.py reads the environment on import, so set it before any app module
+# is imported: a small synthetic dataset, the offline stub LLM and no state
+# outside the temporary directory
+DATA_DIR = tempfile.mkdtemp(prefix="procurement-tests-")
+os.environ.update({
+    "PROCUREMENT_DATA_PATH": os.path.join(DATA_DIR, "purchase_orders.csv"),
+    "DATA_CACHE_DIR": os.path.join(DATA_DIR, "cache"),
+    "LLM_PROVIDER": "stub",
+    "STUB_LLM_LATENCY": "0",
+    "HISTORY_BACKEND": "memory",
+    "ANSWER_CACHE_EMBED_MODEL": "",
+})
+
+
+@pytest.fixture(scope="session")
+def dataset_csv():
+    """Path of a synthetic raw CSV in the layout of the real extract."""
+    import config
+    from benchmarks.cleaning import synthetic_frame
+
+    if not os.path.exists(config.DATA_PATH):
+        synthetic_frame(2000).to_csv(config.DATA_PATH, index=False)
+    return config.DATA_PATH
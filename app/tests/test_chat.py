@@ -0,0 +1,19 @@
+from fastapi.testclient import TestClient
+
+import config
+import main
+
+
+def test_llm_answer_without_sandbox(dataset_csv, monkeypatch):
+    # Generated code then runs in-process, on a chat executor thread
+    monkeypatch.setattr(config, "SANDBOX_ENABLED", False)
+    question = "Which items were bought most often?"
+
+    with TestClient(main.app) as client:
+        response = client.post("/api/v1/chat/submit/test-chat", json={"request": question})
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["source"] == "llm", body
+    assert body["result"]["kind"] == "table", body.get("message")
+    assert body["result"]["columns"][0]["name"] == "Item Name"
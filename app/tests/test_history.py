@@ -0,0 +1,54 @@
+import os
+import sqlite3
+import subprocess
+import sys
+import threading
+from multiprocessing import Process
+
+from history import SQLiteHistory
+
+from conftest import APP_DIR
+
+
+def write(path, process, threads, appends):
+    history = SQLiteHistory(path)
+
+    def run(thread):
+        for i in range(appends):
+            history.append(f"chat-{(thread + i) % 4}", [
+                {"role": "user", "message": f"p{process} t{thread} #{i}"},
+                {"role": "assistant", "message": "answer"},
+            ])
+
+    workers = [threading.Thread(target=run, args=(t,)) for t in range(threads)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    history.close()
+
+
+def test_import_does_not_create_database(tmp_path):
+    path = tmp_path / "history.db"
+    env = dict(os.environ, HISTORY_BACKEND="sqlite", HISTORY_DB_PATH=str(path))
+    subprocess.run([sys.executable, "-c", "import main"], cwd=APP_DIR, env=env, check=True)
+    assert not path.exists()
+
+
+def test_concurrent_writers_keep_every_message(tmp_path):
+    path = str(tmp_path / "history.db")
+    processes, threads, appends = 4, 4, 25
+    SQLiteHistory(path).close()
+
+    writers = [Process(target=write, args=(path, p, threads, appends)) for p in range(processes)]
+    for writer in writers:
+        writer.start()
+    for writer in writers:
+        writer.join()
+    assert [writer.exitcode for writer in writers] == [0] * processes
+
+    with sqlite3.connect(path) as conn:
+        (messages,) = conn.execute("SELECT count(*) FROM messages").fetchone()
+        (chats,) = conn.execute("SELECT count(*) FROM chats").fetchone()
+    assert messages == processes * threads * appends * 2
+    assert chats == 4
@@ -0,0 +1,164 @@
+import os
+import re
+import bisect
+import logging
+import numpy as np
+import pandas as pd
+
+from dataset import store
+
+
+logger = logging.getLogger(__name__)
+
+TEXT_COLUMNS = ["Item Name", "Item Description"]
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+# Bump when the on-disk layout changes
+INDEX_FORMAT = 1
+
+SEARCH_HELP = (
+    "\nA helper function search_items(text, prefix=False) is available. It "
+    "returns the row positions of purchases whose Item Name or Item Description "
+    "contains every word of text (with prefix=True, words only need to start "
+    "with the given text). Use df.iloc[search_items('laptop')] instead of "
+    "df['Item Description'].str.contains(...).\n"
+)
+
+
+def tokenize(text):
+    """Lower-cases ``text`` and splits it into alphanumeric tokens."""
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+class InvertedIndex:
+    """
+    Inverted index from tokens of Item Name/Item Description to row positions.
+
+    Stored in CSR layout: ``vocabulary`` is sorted, and the postings (sorted
+    row positions) of term ``i`` are ``postings[offsets[i]:offsets[i + 1]]``.
+    Because the vocabulary is sorted, all terms sharing a prefix are adjacent,
+    so a prefix lookup is one contiguous slice of ``postings``.
+    """
+
+    def __init__(self, vocabulary, offsets, postings):
+        self.vocabulary = vocabulary
+        self.offsets = offsets
+        self.postings = postings
+
+    @classmethod
+    def build(cls, df):
+        """
+        Tokenizes the text columns of ``df`` and builds the index.
+
+        Args:
+            df (pd.DataFrame): Cleaned procurement data.
+
+        Returns:
+            InvertedIndex: Index over the row positions of ``df``.
+        """
+        text = df[TEXT_COLUMNS[0]].astype(str)
+        for col in TEXT_COLUMNS[1:]:
+            text = text + " " + df[col].astype(str)
+        tokens = pd.Series(text.to_numpy(), index=np.arange(len(df), dtype=np.int32))
+        tokens = tokens.str.lower().str.findall(TOKEN_PATTERN).explode().dropna()
+
+        codes, vocabulary = pd.factorize(tokens.to_numpy(), sort=True)
+        rows = tokens.index.to_numpy(dtype=np.int32)
+
+        # Sort by (term, row) and drop repeated tokens within a row
+        order = np.lexsort((rows, codes))
+        codes, rows = codes[order], rows[order]
+        keep = np.ones(len(codes), dtype=bool)
+        keep[1:] = (codes[1:] != codes[:-1]) | (rows[1:] != rows[:-1])
+        codes, rows = codes[keep], rows[keep]
+
+        offsets = np.searchsorted(codes, np.arange(len(vocabulary) + 1)).astype(np.int64)
+        return cls(list(vocabulary), offsets, rows)
+
+    def _term_range(self, token, prefix):
+        lo = bisect.bisect_left(self.vocabulary, token)
+        if prefix:
+            hi = bisect.bisect_left(self.vocabulary, token + "\uffff")
+        else:
+            hi = lo + 1 if lo < len(self.vocabulary) and self.vocabulary[lo] == token else lo
+        return lo, hi
+
+    def lookup(self, token, prefix=False):
+        """
+        Returns the sorted row positions containing ``token`` (or, with
+        ``prefix=True``, any token starting with it).
+        """
+        lo, hi = self._term_range(token, prefix)
+        positions = self.postings[self.offsets[lo]:self.offsets[hi]]
+        # A prefix spans several terms whose postings may overlap
+        return np.unique(positions) if prefix and hi - lo > 1 else positions
+
+    def search(self, text, prefix=False):
+        """
+        Returns the row positions whose text contains every token of ``text``.
+
+        Args:
+            text (str): Keywords, e.g. "laptop computer".
+            prefix (bool): Match tokens as prefixes ("lap" matches "laptop").
+
+        Returns:
+            np.ndarray: Sorted row positions, usable with ``df.iloc``.
+        """
+        result = None
+        for token in tokenize(text):
+            positions = self.lookup(token, prefix)
+            result = positions if result is None else np.intersect1d(result, positions, assume_unique=True)
+            if len(result) == 0:
+                break
+        return result if result is not None else np.empty(0, dtype=np.int32)
+
+    def save(self, path):
+        """Writes the index to an uncompressed ``.npz`` file, atomically."""
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp.npz"
+        vocabulary = np.frombuffer("\n".join(self.vocabulary).encode("utf-8"), dtype=np.uint8)
+        np.savez(
+            tmp_path, format=np.array([INDEX_FORMAT]),
+            vocabulary=vocabulary, offsets=self.offsets, postings=self.postings,
+        )
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        """Reads an index written by save()."""
+        with np.load(path) as data:
+            if int(data["format"][0]) != INDEX_FORMAT:
+                raise ValueError(f"Unsupported text index format in {path}")
+            text = data["vocabulary"].tobytes().decode("utf-8")
+            vocabulary = text.split("\n") if text else []
+            return cls(vocabulary, data["offsets"], data["postings"])
+
+
+def build_text_index(df):
+    """
+    Loads the persisted index for the current dataset, or builds and persists it.
+    """
+    path = store.artifact_path(".text-index.npz")
+    if path is not None and os.path.exists(path):
+        try:
+            return InvertedIndex.load(path)
+        except Exception:
+            logger.exception("Discarding unreadable text index %s", path)
+
+    index = InvertedIndex.build(df)
+    if path is not None:
+        try:
+            index.save(path)
+        except OSError:
+            logger.exception("Could not write text index %s", path)
+    return index
+
+
+def get_text_index():
+    """Returns the text index for the current dataset version, built once."""
+    return store.derived("text_index", build_text_index)
+
+
+def query_locals():
+    """Helpers made available to generated pandas code run on the dataset."""
+    return {"search_items": get_text_index().search}
@@ -0,0 +1,88 @@
+import numpy as np
+import pandas as pd
+
+from dataset import store
+
+
+# Period frequency of each rollup; fiscal years run July 1 - June 30
+ROLLUP_FREQUENCIES = {
+    "daily": "D",
+    "monthly": "M",
+    "quarterly": "Q",
+    "fiscal_year": "Y-JUN",
+}
+
+
+class TimeIndex:
+    """
+    Binary-searchable index over "Creation Date" plus precomputed rollups.
+
+    Requires the frame to be sorted by "Creation Date" with missing dates
+    last, which DatasetStore guarantees. Any date range then maps to a
+    contiguous slice of rows found with two binary searches, and prefix
+    sums of "Total Price" give the range's order count and total in
+    O(log n) without touching the rows themselves.
+    """
+
+    def __init__(self, df):
+        dates = df["Creation Date"].to_numpy(dtype="datetime64[ns]")
+        # Missing dates sort last; keep them out of every range
+        self.valid = int(np.count_nonzero(~np.isnat(dates)))
+        self.dates = dates[:self.valid]
+        prices = df["Total Price"].to_numpy(dtype="float64")[:self.valid]
+        self.cumulative_total = np.concatenate([[0.0], np.nancumsum(prices)])
+
+        created = df["Creation Date"].iloc[:self.valid]
+        price_series = df["Total Price"].iloc[:self.valid]
+        self.rollups = {
+            name: price_series.groupby(created.dt.to_period(freq).rename("Period"))
+            .agg(orders="size", total="sum")
+            for name, freq in ROLLUP_FREQUENCIES.items()
+        }
+
+    def positions(self, start, end):
+        """
+        Returns the row positions covering ``start <= Creation Date < end``.
+
+        Args:
+            start: Inclusive lower bound (anything pd.Timestamp accepts).
+            end: Exclusive upper bound.
+
+        Returns:
+            tuple[int, int]: ``(lo, hi)`` such that ``df.iloc[lo:hi]`` is the range.
+        """
+        bounds = np.array([pd.Timestamp(start), pd.Timestamp(end)], dtype="datetime64[ns]")
+        lo, hi = np.searchsorted(self.dates, bounds, side="left")
+        return int(lo), int(hi)
+
+    def rows(self, df, start, end):
+        """Returns the rows of ``df`` created in ``[start, end)`` without a full scan."""
+        lo, hi = self.positions(start, end)
+        return df.iloc[lo:hi]
+
+    def summary(self, start, end):
+        """
+        Order count and total spend for ``start <= Creation Date < end``.
+
+        Returns:
+            dict: ``{"orders": int, "total": float}``.
+        """
+        lo, hi = self.positions(start, end)
+        return {"orders": hi - lo, "total": float(self.cumulative_total[hi] - self.cumulative_total[lo])}
+
+    def rollup(self, name, start=None, end=None):
+        """
+        Returns a slice of the ``daily``, ``monthly``, ``quarterly`` or
+        ``fiscal_year`` rollup covering periods from ``start`` up to ``end``.
+        """
+        table = self.rollups[name]
+        if start is not None:
+            table = table[table.index.end_time >= pd.Timestamp(start)]
+        if end is not None:
+            table = table[table.index.start_time < pd.Timestamp(end)]
+        return table
+
+
+def get_time_index():
+    """Returns the time index for the current dataset version, built once."""
+    return store.derived("time_index", TimeIndex)